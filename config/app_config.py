@@ -1,11 +1,22 @@
-from dataclasses import dataclass
+from typing import Final
+
 
-@dataclass
 class AppConfig:
     """Configuration constants for the application"""
-    WINDOW_MIN_WIDTH = 1000
-    WINDOW_MIN_HEIGHT = 800
-    IMAGE_DISPLAY_WIDTH = 600
-    IMAGE_DISPLAY_HEIGHT = 400
-    MARKER_EXTENSION = ".mod_sorted"
-    CACHE_FILE_PATH = 'mod_cache.json'
\ No newline at end of file
+    WINDOW_MIN_WIDTH: Final = 1000
+    WINDOW_MIN_HEIGHT: Final = 800
+    IMAGE_DISPLAY_WIDTH: Final = 600
+    IMAGE_DISPLAY_HEIGHT: Final = 400
+    MARKER_EXTENSION: Final = ".mod_sorted"
+    CACHE_FILE_PATH: Final = 'mod_cache.json'
+    CACHE_PREVIEW_DIR: Final = 'mod_cache'
+    # Last folder scan, reused at startup while none of the scanned folders has changed
+    SCAN_CACHE_FILE_PATH: Final = 'scan_cache.json'
+    CACHE_MAX_ENTRIES: Final = 500
+    # Cache changes are written to disk in batches of this size (and on exit)
+    CACHE_SAVE_INTERVAL: Final = 64
+    # Previews inflated on demand that stay in memory; older ones are re-read when shown again
+    LAZY_PREVIEW_CACHE_SIZE: Final = 64
+    # Append the sorted marker to a copy of the zip that then replaces it, instead of in place.
+    # Safer against crashes mid-write, but costs a full copy where the filesystem can't reflink
+    ATOMIC_MARKER_APPEND: Final = False
@@ -0,0 +1,165 @@
+import codecs
+import json
+from typing import Optional, List, Union, Any
+from utils.logger import logger
+
+try:
+    # pip install msgspec -- typed JSON decoding straight into structs
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    # pip install orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if msgspec is not None:
+    Scalar = Union[str, int, float, None]
+    TextOrList = Union[str, List[Scalar], None]
+
+    class YearsInfo(msgspec.Struct):
+        min: Scalar = None
+        max: Scalar = None
+
+    class EngineInfo(msgspec.Struct):
+        Type: Scalar = None
+        Configuration: Scalar = None
+        Displacement: Scalar = None
+        Power: Scalar = None
+
+    class TransmissionInfo(msgspec.Struct):
+        Type: Scalar = None
+        Gears: Scalar = None
+
+    class VehicleInfo(msgspec.Struct):
+        """Fields of a vehicle's info.json; unknown keys are ignored."""
+        Name: Scalar = None
+        Author: Scalar = None
+        Brand: Scalar = None
+        Country: Scalar = None
+        Type: Scalar = None
+        body_style: Scalar = msgspec.field(default=None, name='Body Style')
+        derby_class: Scalar = msgspec.field(default=None, name='Derby Class')
+        Years: YearsInfo = msgspec.field(default_factory=YearsInfo)
+        Engine: EngineInfo = msgspec.field(default_factory=EngineInfo)
+        Transmission: TransmissionInfo = msgspec.field(default_factory=TransmissionInfo)
+
+    class MapInfo(msgspec.Struct):
+        """Fields of a level's info.json; unknown keys are ignored."""
+        title: Scalar = None
+        authors: TextOrList = None
+        biome: Scalar = None
+        description: Scalar = None
+        roads: TextOrList = None
+        suitablefor: TextOrList = None
+        size: List[Scalar] = msgspec.field(default_factory=list)
+        previews: List[str] = msgspec.field(default_factory=list)
+
+    _vehicle_decoder = msgspec.json.Decoder(VehicleInfo)
+    _map_decoder = msgspec.json.Decoder(MapInfo)
+else:
+    # Same attributes as the Structs above, filled from a plain json/orjson parse
+
+    def _object(data: Any) -> dict:
+        return data if isinstance(data, dict) else {}
+
+    class YearsInfo:
+        def __init__(self, data: Any = None):
+            data = _object(data)
+            self.min = data.get('min')
+            self.max = data.get('max')
+
+    class EngineInfo:
+        def __init__(self, data: Any = None):
+            data = _object(data)
+            self.Type = data.get('Type')
+            self.Configuration = data.get('Configuration')
+            self.Displacement = data.get('Displacement')
+            self.Power = data.get('Power')
+
+    class TransmissionInfo:
+        def __init__(self, data: Any = None):
+            data = _object(data)
+            self.Type = data.get('Type')
+            self.Gears = data.get('Gears')
+
+    class VehicleInfo:
+        """Fields of a vehicle's info.json; unknown keys are ignored."""
+        def __init__(self, data: dict):
+            self.Name = data.get('Name')
+            self.Author = data.get('Author')
+            self.Brand = data.get('Brand')
+            self.Country = data.get('Country')
+            self.Type = data.get('Type')
+            self.body_style = data.get('Body Style')
+            self.derby_class = data.get('Derby Class')
+            self.Years = YearsInfo(data.get('Years'))
+            self.Engine = EngineInfo(data.get('Engine'))
+            self.Transmission = TransmissionInfo(data.get('Transmission'))
+
+    class MapInfo:
+        """Fields of a level's info.json; unknown keys are ignored."""
+        def __init__(self, data: dict):
+            self.title = data.get('title')
+            self.authors = data.get('authors')
+            self.biome = data.get('biome')
+            self.description = data.get('description')
+            self.roads = data.get('roads')
+            self.suitablefor = data.get('suitablefor')
+            self.size = data.get('size') if isinstance(data.get('size'), list) else []
+            self.previews = [p for p in data.get('previews') or [] if isinstance(p, str)]
+
+    class _JsonDecoder:
+        def __init__(self, info_type):
+            self.info_type = info_type
+
+        def decode(self, buf: bytes):
+            data = orjson.loads(buf) if orjson is not None else json.loads(buf)
+            if not isinstance(data, dict):
+                raise ValueError("info.json is not a JSON object")
+            return self.info_type(data)
+
+    _vehicle_decoder = _JsonDecoder(VehicleInfo)
+    _map_decoder = _JsonDecoder(MapInfo)
+
+
+def _decode(decoder, buf: bytes) -> Optional[Any]:
+    if buf.startswith(codecs.BOM_UTF8):
+        buf = buf[len(codecs.BOM_UTF8):]
+    try:
+        return decoder.decode(buf)
+    except ValueError as e:
+        # BeamNG info files are often loose JSON; callers fall back to regex extraction
+        logger.debug("info.json decode failed: %s", e)
+        return None
+
+
+def decode_vehicle_info(buf: bytes) -> Optional[VehicleInfo]:
+    """Decodes a vehicle info.json in one parse, or returns None if it is not valid JSON."""
+    return _decode(_vehicle_decoder, buf)
+
+
+def decode_map_info(buf: bytes) -> Optional[MapInfo]:
+    """Decodes a level info.json in one parse, or returns None if it is not valid JSON."""
+    return _decode(_map_decoder, buf)
+
+
+def as_text(value) -> Optional[str]:
+    """Renders a decoded scalar (or list of scalars) the way the regex extraction would return it."""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ', '.join(str(v) for v in value)
+    return str(value)
+
+
+def as_list(value) -> List[str]:
+    """Normalizes a comma-separated string or a JSON list to a list of strings."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [s.strip() for s in value.split(',')]
@@ -1,112 +1,458 @@
+import codecs
+import functools
+import io
+import logging
 import zipfile
 import json
 import os
-from typing import Optional, List, Dict
-from core.mod_info import ModInfo, ModType
+import posixpath
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, FrozenSet, Tuple
+from core.info_schema import decode_vehicle_info, decode_map_info, as_text, as_list
+from core.mod_cache import ModCache
+from core.mod_info import ModInfo, ModType, LazyBytes
+from utils.image_utils import make_thumbnail
 from utils.logger import logger
 import re
 
+try:
+    # pip install orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+@dataclass
+class ZipIndex:
+    """Entry buckets collected in a single pass over a zip's namelist."""
+    file_list: List[str]
+    file_set: FrozenSet[str]
+    vehicle_info_file: Optional[str] = None
+    map_info_file: Optional[str] = None
+    generic_info_file: Optional[str] = None
+    # Directory -> the .pc configs directly inside it
+    pc_by_dir: Dict[str, List[str]] = field(default_factory=dict)
+    # Only the first MAX_GENERIC_PREVIEWS images are kept
+    image_files: List[str] = field(default_factory=list)
+    # Entry path without extension -> preferred png/jpg/jpeg entry with that stem
+    images_by_stem: Dict[str, str] = field(default_factory=dict)
+
+
+IMAGE_EXTENSIONS = frozenset(('png', 'jpg', 'jpeg'))
+# Config preview extensions, most preferred first, when a config has several
+VEHICLE_PREVIEW_RANK = {'png': 0, 'jpg': 1, 'jpeg': 2}
+MAX_GENERIC_PREVIEWS = 3
+READ_CHUNK_SIZE = 64 * 1024
+_BUF_POOL: "queue.SimpleQueue[bytearray]" = queue.SimpleQueue()
+# Previews read while the archive is open; the rest are inflated on first display
+EAGER_PREVIEW_COUNT = 1
+# In-process memo in front of the disk cache; bounded because results hold preview bytes
+ANALYSIS_MEMO_SIZE = 256
+
+
+def _image_ext(name: str) -> Optional[str]:
+    """Returns the lowercase extension of an image entry, or None for any other entry."""
+    _, dot, ext = name.rpartition('.')
+    # No dot, or the last dot is in a folder name: not an extension at all
+    if not dot or '/' in ext:
+        return None
+    if ext in IMAGE_EXTENSIONS:
+        return ext
+    # Only the (short) extension is lowercased, never the full path
+    ext = ext.lower()
+    return ext if ext in IMAGE_EXTENSIONS else None
+
+
+# Byte patterns: the regex fallback scans raw info.json bytes and decodes only the matches
+@functools.lru_cache(maxsize=128)
+def _get_pattern(key: str) -> "re.Pattern[bytes]":
+    """Returns the compiled regex for a `"key": "value"` pair, compiling it once."""
+    return re.compile(b'"' + re.escape(key.encode('utf-8')) + rb'"\s*:\s*"([^"]*)"', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=128)
+def _get_section_pattern(section: str) -> "re.Pattern[bytes]":
+    """Returns the compiled regex capturing the body of a flat `"section": {...}` object."""
+    return re.compile(b'"' + re.escape(section.encode('utf-8')) + rb'"\s*:\s*(\{[^{}]*\})', re.IGNORECASE)
+
+
+# Top-level keys the vehicle and map detectors always look up
+for _key in ('Name', 'Author', 'Country', 'Derby Class', 'Type', 'Brand', 'Body Style',
+             'title', 'authors', 'biome', 'description', 'roads', 'suitablefor', 'previews'):
+    _get_pattern(_key)
+
+
+def _kv(parts: List[str], label: str, value: Optional[str]):
+    """Appends a 'label: value' description line, using N/A for missing values."""
+    parts.append(f"{label}: {value}" if value else f"{label}: N/A")
+
+
+def _analyze_one(zip_path: str) -> ModInfo:
+    """
+    Module-level wrapper so worker processes can unpickle the target. A zip that can't be
+    analyzed at all (missing, unreadable) gets an error ModInfo instead of failing the batch.
+    """
+    try:
+        return ModAnalyzer.analyze_zip(zip_path)
+    except Exception as e:
+        logger.error(f"Could not analyze {zip_path}: {e}")
+        return ModAnalyzer._create_invalid_zip_mod_info(zip_path, f"Could not analyze file: {e}")
+
+
+# (path, mtime_ns, size) -> result; edited files miss it. Keyed without the ModCache so
+# the memo never keeps a cache instance alive
+_analysis_memo: "OrderedDict[Tuple[str, int, int], ModInfo]" = OrderedDict()
+_analysis_memo_lock = threading.Lock()
+
+
+def _remember_analysis(key: Tuple[str, int, int], mod_info: ModInfo):
+    with _analysis_memo_lock:
+        _analysis_memo[key] = mod_info
+        _analysis_memo.move_to_end(key)
+        while len(_analysis_memo) > ANALYSIS_MEMO_SIZE:
+            _analysis_memo.popitem(last=False)
+
+
 class ModAnalyzer:
     @staticmethod
-    def analyze_zip(zip_path: str) -> ModInfo:
-        logger.debug(f"Analyzing zip file: {zip_path}")
+    def analyze_many(paths: List[str], workers: Optional[int] = None,
+                     cache: Optional[ModCache] = None) -> List[ModInfo]:
+        """
+        Analyzes many zip files in parallel, returning results in the order of `paths`.
+
+        Inflating info.json and previews is CPU-bound, so the work is sharded across
+        processes. Scaling flattens out once the disk is saturated (roughly 8 workers
+        on a typical SSD); beyond that extra workers only add pickling overhead.
+        Falls back to a thread pool if worker processes cannot be started.
+
+        Args:
+            paths: Paths of the zip files to analyze.
+            workers: Number of worker processes (defaults to the CPU count).
+            cache: Optional ModCache. Hits are served in this process without starting
+                   a worker, and only this process writes the results back.
+
+        Returns:
+            A list of ModInfo objects, one per path.
+        """
+        if not paths:
+            return []
+
+        results: List[Optional[ModInfo]] = [None] * len(paths)
+        pending: List[Tuple[int, Optional[os.stat_result]]] = []
+        for i, path in enumerate(paths):
+            try:
+                stats = os.stat(path)
+            except OSError:
+                stats = None
+            if cache is not None and stats is not None:
+                results[i] = cache.get_mod_info(path, stats.st_mtime_ns, stats.st_size)
+            if results[i] is None:
+                pending.append((i, stats))
+
+        if pending:
+            misses = [paths[i] for i, _ in pending]
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(misses) // (workers * 4))
+            logger.info(f"Analyzing {len(misses)} of {len(paths)} zip files with {workers} workers (chunksize={chunksize})")
+
+            # Only a pool that can't start falls back; per-file errors are handled in _analyze_one
+            analyzed = None
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            except OSError as e:
+                logger.warning(f"Process pool unavailable ({e}), falling back to threads.")
+            else:
+                try:
+                    with executor:
+                        analyzed = list(executor.map(_analyze_one, misses, chunksize=chunksize))
+                except BrokenProcessPool as e:
+                    logger.warning(f"Process pool broke ({e}), falling back to threads.")
+            if analyzed is None:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    analyzed = list(executor.map(_analyze_one, misses))
+
+            for (i, stats), mod_info in zip(pending, analyzed):
+                results[i] = mod_info
+                if cache is not None and stats is not None:
+                    cache.store_mod_info(paths[i], mod_info, stats.st_mtime_ns, stats.st_size)
+
+        if cache is not None:
+            cache.flush()
+        return results
+
+    @staticmethod
+    def analyze_zip(zip_path: str, cache: Optional[ModCache] = None) -> ModInfo:
+        """
+        Analyzes a mod zip, consulting the persistent cache first when one is given.
+
+        Args:
+            zip_path: Path to the zip file.
+            cache: Optional ModCache; unchanged zips are served from it and misses are written back.
+
+        Returns:
+            The ModInfo describing the mod. Repeat calls for an unchanged file within
+            the session return the same object.
+        """
+        try:
+            stats = os.stat(zip_path)
+        except OSError:
+            return ModAnalyzer._analyze_with_cache(zip_path, cache)
+        return ModAnalyzer._analyze_with_cache(zip_path, cache, stats.st_mtime_ns, stats.st_size)
+
+    @staticmethod
+    def _analyze_with_cache(zip_path: str, cache: Optional[ModCache], mtime_ns: Optional[int] = None,
+                            size: Optional[int] = None) -> ModInfo:
+        memo_key = None if mtime_ns is None or size is None else (zip_path, mtime_ns, size)
+        if memo_key is not None:
+            with _analysis_memo_lock:
+                mod_info = _analysis_memo.get(memo_key)
+                if mod_info is not None:
+                    _analysis_memo.move_to_end(memo_key)
+                    return mod_info
+
+        mod_info = cache.get_mod_info(zip_path, mtime_ns, size) if cache is not None else None
+        if mod_info is None:
+            mod_info = ModAnalyzer._analyze_zip_impl(zip_path)
+            if cache is not None:
+                cache.store_mod_info(zip_path, mod_info, mtime_ns, size)
+        if memo_key is not None and not mod_info.is_error:
+            _remember_analysis(memo_key, mod_info)
+        return mod_info
+
+    @staticmethod
+    def _analyze_zip_impl(zip_path: str) -> ModInfo:
+        logger.debug("Analyzing zip file: %s", zip_path)
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zf:
+            zf = zipfile.ZipFile(zip_path, 'r')
+        except zipfile.BadZipFile as e:
+            logger.error(f"Invalid zip file: {zip_path} - {e}")
+            return ModAnalyzer._create_invalid_zip_mod_info(zip_path, f"Invalid zip file: {e}")
+
+        with zf:
+            index = None
+            try:
                 file_list = zf.namelist()
-                logger.debug(f"File list: {file_list}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("File list (%d entries): %s", len(file_list), file_list)
+                index = ModAnalyzer._index_zip(file_list)
 
-                vehicle_info = ModAnalyzer._check_vehicle_mod(zf, file_list)
-                if vehicle_info:
+                # The index already knows the mod type; only the matching detector runs
+                if index.vehicle_info_file:
+                    vehicle_info = ModAnalyzer._check_vehicle_mod(zf, index)
                     logger.info(f"Detected vehicle mod: {vehicle_info.name}")
                     return vehicle_info
 
-                map_info = ModAnalyzer._check_map_mod(zf, file_list)
-                if map_info:
+                if index.map_info_file:
+                    map_info = ModAnalyzer._check_map_mod(zf, index)
                     logger.info(f"Detected map mod: {map_info.name}")
                     return map_info
 
-                other_info = ModAnalyzer._create_other_mod_info(zf, file_list)
+                other_info = ModAnalyzer._create_other_mod_info(zf, index)
                 logger.info(f"Detected other mod: {other_info.name}")
                 return other_info
-        except zipfile.BadZipFile as e:
-            logger.error(f"Invalid zip file: {zip_path} - {e}")
-            return ModAnalyzer._create_fallback_mod_info(zipfile.ZipFile(zip_path, 'r'), "", ModType.OTHER, f"Invalid zip file: {e}")
-        except Exception as e:
-            logger.exception(f"Error analyzing zip file: {zip_path}")
-            return ModAnalyzer._create_fallback_mod_info(zipfile.ZipFile(zip_path, 'r'), "", ModType.OTHER, str(e))
+            except Exception as e:
+                logger.exception(f"Error analyzing zip file: {zip_path}")
+                return ModAnalyzer._create_fallback_mod_info(zf, index, "", ModType.OTHER, str(e))
+
+    @staticmethod
+    def _create_invalid_zip_mod_info(zip_path: str, error_message: str) -> ModInfo:
+        """Creates a ModInfo for a file that can't be opened as a zip at all."""
+        return ModInfo(
+            name=os.path.splitext(os.path.basename(zip_path))[0],
+            author="Unknown",
+            type=ModType.OTHER,
+            description=f"{error_message}\n\nCould not load mod details.",
+            preview_images=[],
+            additional_info={},
+            is_error=True
+        )
+
+    @staticmethod
+    def _read_entry(zf: zipfile.ZipFile, name: str) -> bytes:
+        """
+        Reads a zip entry into memory.
+
+        Entries smaller than one chunk are read directly; larger ones are streamed
+        through a pooled 64 KiB buffer so multi-MB previews don't force the inflater
+        to allocate a fresh intermediate buffer per image.
+        """
+        if zf.getinfo(name).file_size < READ_CHUNK_SIZE:
+            with zf.open(name) as src:
+                return src.read()
+
+        try:
+            buf = _BUF_POOL.get_nowait()
+        except queue.Empty:
+            buf = bytearray(READ_CHUNK_SIZE)
+
+        out = io.BytesIO()
+        try:
+            with zf.open(name) as src, memoryview(buf) as view:
+                while True:
+                    n = src.readinto(view)
+                    if not n:
+                        break
+                    out.write(view[:n])
+        finally:
+            _BUF_POOL.put(buf)
+        return out.getvalue()
+
+    @staticmethod
+    def _read_eager_previews(zf: zipfile.ZipFile, entries: List[Tuple[str, str]]) -> Dict[str, bytes]:
+        """Reads the first EAGER_PREVIEW_COUNT preview entries; the rest stay lazy."""
+        loaded = {}
+        for _, entry_name in entries[:EAGER_PREVIEW_COUNT]:
+            try:
+                loaded[entry_name] = ModAnalyzer._read_entry(zf, entry_name)
+            except Exception as e:
+                logger.warning(f"Could not load preview image {entry_name}: {e}")
+        return loaded
+
+    @staticmethod
+    def _lazy_previews(zf: zipfile.ZipFile, entries: List[Tuple[str, str]],
+                       loaded: Dict[str, bytes]) -> List[Tuple[str, LazyBytes]]:
+        """
+        Wraps (label, entry name) pairs in LazyBytes, reusing any bytes already inflated.
+        Eager entries that failed to load are dropped, as they were before previews became lazy.
+        """
+        previews = []
+        for position, (label, entry_name) in enumerate(entries):
+            if position < EAGER_PREVIEW_COUNT and entry_name not in loaded:
+                continue
+            data = loaded.get(entry_name)
+            if data is not None:
+                data = make_thumbnail(data)
+            previews.append((label, LazyBytes(zf.filename, entry_name, data)))
+        return previews
 
     @staticmethod
-    def _check_vehicle_mod(zf: zipfile.ZipFile, file_list: List[str]) -> Optional[ModInfo]:
-        logger.debug(f"Checking for vehicle mod in {zf.filename}")
-        info_file = next((name for name in file_list
-                          if 'vehicles' in name.split('/') and 'info.json' in name), None)
+    def _load_json(zf: zipfile.ZipFile, name: str) -> Dict:
+        """Reads a JSON entry in one go and parses it with orjson when available."""
+        with zf.open(name) as f:
+            buf = f.read()
+        if buf.startswith(codecs.BOM_UTF8):
+            buf = buf[len(codecs.BOM_UTF8):]
+        if orjson is not None:
+            return orjson.loads(buf)
+        return json.loads(buf)
+
+    @staticmethod
+    def _index_zip(file_list: List[str]) -> ZipIndex:
+        """Classifies every entry of the zip in one pass so the detectors don't re-scan the namelist."""
+        index = ZipIndex(file_list=file_list, file_set=frozenset(file_list))
+
+        images_by_stem = index.images_by_stem
+        for name in file_list:
+            stem, dot, ext = name.rpartition('.')
+            rank = VEHICLE_PREVIEW_RANK.get(ext) if dot else None
+            if rank is not None:
+                current = images_by_stem.get(stem)
+                if current is None or rank < VEHICLE_PREVIEW_RANK[current.rpartition('.')[2]]:
+                    images_by_stem[stem] = name
+            if len(index.image_files) < MAX_GENERIC_PREVIEWS and _image_ext(name):
+                index.image_files.append(name)
+            elif name.endswith('.pc'):
+                index.pc_by_dir.setdefault(name.rpartition('/')[0], []).append(name)
+            if name.endswith('info.json'):
+                if index.generic_info_file is None:
+                    index.generic_info_file = name
+                if name.endswith('/info.json'):
+                    if index.vehicle_info_file is None and (name.startswith('vehicles/') or '/vehicles/' in name):
+                        index.vehicle_info_file = name
+                    if index.map_info_file is None and (name.startswith('levels/') or '/levels/' in name):
+                        index.map_info_file = name
+
+        logger.debug("Indexed %s entries: %s .pc dirs, %s images", len(file_list), len(index.pc_by_dir), len(index.image_files))
+        return index
+
+    @staticmethod
+    def _check_vehicle_mod(zf: zipfile.ZipFile, index: ZipIndex) -> Optional[ModInfo]:
+        logger.debug("Checking for vehicle mod in %s", zf.filename)
+        info_file = index.vehicle_info_file
+        file_set = index.file_set
 
         if not info_file:
             logger.debug("No vehicle info.json found.")
             return None
 
-        logger.debug(f"Found vehicle info.json: {info_file}")
+        logger.debug("Found vehicle info.json: %s", info_file)
 
-        try:
-            with zf.open(info_file) as f:
-                file_content = f.read().decode('utf-8', 'ignore')
-            name = ModAnalyzer._extract_value_from_json_string(file_content, 'Name')
-            author = ModAnalyzer._extract_value_from_json_string(file_content, 'Author')
-            country = ModAnalyzer._extract_value_from_json_string(file_content, 'Country')
-            derby_class = ModAnalyzer._extract_value_from_json_string(file_content, 'Derby Class')
-            mod_type = ModAnalyzer._extract_value_from_json_string(file_content, 'Type')
-
-            engine_type = ModAnalyzer._extract_value_from_json_string(file_content, 'Type', section='Engine')
-            engine_configuration = ModAnalyzer._extract_value_from_json_string(file_content, 'Configuration', section='Engine')
-            engine_displacement = ModAnalyzer._extract_value_from_json_string(file_content, 'Displacement', section='Engine')
-            engine_power = ModAnalyzer._extract_value_from_json_string(file_content, 'Power', section='Engine')
-
-            transmission_type = ModAnalyzer._extract_value_from_json_string(file_content, 'Type', section='Transmission')
-            transmission_gears = ModAnalyzer._extract_value_from_json_string(file_content, 'Gears', section='Transmission')
-            years_min = ModAnalyzer._extract_value_from_json_string(file_content, 'min', section='Years')
-            years_max = ModAnalyzer._extract_value_from_json_string(file_content, 'max', section='Years')
-            brand = ModAnalyzer._extract_value_from_json_string(file_content, 'Brand')
-            body_style = ModAnalyzer._extract_value_from_json_string(file_content, 'Body Style')
+        base_dir = posixpath.dirname(info_file)
+        logger.debug("Base directory: %s", base_dir)
 
+        pc_files = index.pc_by_dir.get(base_dir, [])
+        logger.debug("PC files: %s", pc_files)
 
-        except Exception as e:
-            logger.exception(f"Error in _check_vehicle_mod")
-            return ModAnalyzer._create_fallback_mod_info(zf, info_file, ModType.VEHICLE, str(e))
+        preview_entries = []
+        for pc_file in pc_files:
+            config_name = posixpath.splitext(posixpath.basename(pc_file))[0]
+            img_base = posixpath.join(base_dir, config_name)
+            logger.debug("Image base: %s", img_base)
+            img_path = index.images_by_stem.get(img_base)
+            if img_path:
+                preview_entries.append((config_name, img_path))
 
-        preview_images = []
-        base_dir = os.path.dirname(info_file)
-        logger.debug(f"Base directory: {base_dir}")
+        for default_name in ['default.png', 'default.jpg']:
+            default_path = posixpath.join(base_dir, default_name)
+            if default_path in file_set:
+                preview_entries.insert(0, ('default', default_path))
 
-        pc_files = [f for f in file_list if f.startswith(base_dir) and f.endswith('.pc')]
-        logger.debug(f"PC files: {pc_files}")
+        try:
+            with zf.open(info_file) as f:
+                buf = f.read()
+            info = decode_vehicle_info(buf)
+            if info is not None:
+                name = as_text(info.Name)
+                author = as_text(info.Author)
+                country = as_text(info.Country)
+                derby_class = as_text(info.derby_class)
+                mod_type = as_text(info.Type)
+
+                engine_type = as_text(info.Engine.Type)
+                engine_configuration = as_text(info.Engine.Configuration)
+                engine_displacement = as_text(info.Engine.Displacement)
+                engine_power = as_text(info.Engine.Power)
+
+                transmission_type = as_text(info.Transmission.Type)
+                transmission_gears = as_text(info.Transmission.Gears)
+                years_min = as_text(info.Years.min)
+                years_max = as_text(info.Years.max)
+                brand = as_text(info.Brand)
+                body_style = as_text(info.body_style)
+            else:
+                name = ModAnalyzer._extract_value_from_json_string(buf, 'Name')
+                author = ModAnalyzer._extract_value_from_json_string(buf, 'Author')
+                country = ModAnalyzer._extract_value_from_json_string(buf, 'Country')
+                derby_class = ModAnalyzer._extract_value_from_json_string(buf, 'Derby Class')
+                mod_type = ModAnalyzer._extract_value_from_json_string(buf, 'Type')
+
+                # Each section is located once; its keys are then searched in the small body only
+                engine = ModAnalyzer._extract_section(buf, 'Engine') or b''
+                engine_type = ModAnalyzer._extract_value_from_json_string(engine, 'Type')
+                engine_configuration = ModAnalyzer._extract_value_from_json_string(engine, 'Configuration')
+                engine_displacement = ModAnalyzer._extract_value_from_json_string(engine, 'Displacement')
+                engine_power = ModAnalyzer._extract_value_from_json_string(engine, 'Power')
+
+                transmission = ModAnalyzer._extract_section(buf, 'Transmission') or b''
+                transmission_type = ModAnalyzer._extract_value_from_json_string(transmission, 'Type')
+                transmission_gears = ModAnalyzer._extract_value_from_json_string(transmission, 'Gears')
+                years = ModAnalyzer._extract_section(buf, 'Years') or b''
+                years_min = ModAnalyzer._extract_value_from_json_string(years, 'min')
+                years_max = ModAnalyzer._extract_value_from_json_string(years, 'max')
+                brand = ModAnalyzer._extract_value_from_json_string(buf, 'Brand')
+                body_style = ModAnalyzer._extract_value_from_json_string(buf, 'Body Style')
 
-        for pc_file in pc_files:
-            config_name = os.path.splitext(os.path.basename(pc_file))[0]
-            img_base = os.path.join(base_dir, config_name).replace('\\', '/')
-            logger.debug(f"Image base: {img_base}")
-            for ext in ['.png', '.jpg', '.jpeg']:
-                img_path = img_base + ext
-                if img_path in file_list:
-                    try:
-                        with zf.open(img_path) as img:
-                            data = img.read()
-                            logger.debug(f"Found image {img_path} with {len(data)} bytes")
-                            preview_images.append((config_name, data))
-                            break
-                    except Exception as e:
-                        logger.warning(f"Could not load image {img_path}: {e}")
 
+        except Exception as e:
+            logger.exception(f"Error in _check_vehicle_mod")
+            return ModAnalyzer._create_fallback_mod_info(zf, index, info_file, ModType.VEHICLE, str(e))
 
-        for default_name in ['default.png', 'default.jpg']:
-            default_path = os.path.join(base_dir, default_name).replace('\\', '/')
-            if default_path in file_list:
-                try:
-                    with zf.open(default_path) as img:
-                        data = img.read()
-                        logger.debug(f"Found default image {default_path} with {len(data)} bytes")
-                        preview_images.insert(0, ('default', data))
-                except Exception as e:
-                    logger.warning(f"Could not load default image {default_path}: {e}")
+        preview_images = ModAnalyzer._lazy_previews(
+            zf, preview_entries, ModAnalyzer._read_eager_previews(zf, preview_entries))
 
 
         mod_info = ModInfo(
@@ -133,7 +479,7 @@ class ModAnalyzer:
                 'country': country,
                 'derby_class': derby_class,
                 'type': mod_type,
-                'configurations': [os.path.splitext(os.path.basename(pc))[0] for pc in pc_files],
+                'configurations': [posixpath.splitext(posixpath.basename(pc))[0] for pc in pc_files],
                 'raw_info': {'Name':name, 'Author': author, 'Country': country, 'Derby Class': derby_class, 'Type': mod_type}
             }
         )
@@ -141,29 +487,31 @@ class ModAnalyzer:
         return mod_info
 
     @staticmethod
-    def _extract_value_from_json_string(json_string: str, key: str, section: str = None) -> Optional[str]:
+    def _extract_section(json_bytes: bytes, section: str) -> Optional[bytes]:
+        """Returns the raw text of a flat `"section": {...}` object, so its keys can be searched locally."""
+        match = _get_section_pattern(section).search(json_bytes)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _extract_value_from_json_string(json_bytes: bytes, key: str, section: str = None) -> Optional[str]:
         """
-        Extracts a value from a JSON-like string using regular expressions.
+        Extracts a value from raw JSON-like bytes using regular expressions.
 
         Args:
-            json_string: The JSON-like string to extract from.
+            json_bytes: The undecoded JSON-like content to extract from.
             key: The key to extract the value for.
             section: If the key is inside a nested section (e.g., "Engine"), specify the section name.
 
         Returns:
-            The extracted value as a string, or None if not found.
+            The extracted value decoded as UTF-8, or None if not found.
         """
         try:
             if section:
-                 pattern = re.compile(rf'"{section}"\s*:\s*{{.*??"{key}"\s*:\s*"([^"]*?)"', re.DOTALL | re.IGNORECASE)
-            else:
-                pattern = re.compile(rf'"{key}"\s*:\s*"([^"]*?)"', re.IGNORECASE)
-
-            match = pattern.search(json_string)
-            if match:
-                return match.group(1)
-            else:
-                return None
+                json_bytes = ModAnalyzer._extract_section(json_bytes, section)
+                if json_bytes is None:
+                    return None
+            match = _get_pattern(key).search(json_bytes)
+            return match.group(1).decode('utf-8', 'ignore') if match else None
         except Exception as e:
             logger.warning(f"Error extracting value for key '{key}' in section '{section}': {e}")
             return None
@@ -175,54 +523,31 @@ class ModAnalyzer:
                                             engine_configuration: str, engine_displacement: str, engine_power: str,
                                             transmission_type: str, transmission_gears: str) -> str:
         desc_parts = []
-
-        def add_if_present(label: str, value: str):
-            if value:
-                desc_parts.append(f"{label}: {value}")
-            else:
-                desc_parts.append(f"{label}: N/A")
-
-        add_if_present("Brand", brand)
-        add_if_present("Body Style", body_style)
-        add_if_present("Years", f"{years_min}-{years_max}" if years_min and years_max else years_min or years_max) # Handle single year
-        add_if_present("Country", country)
-        add_if_present("Derby Class", derby_class)
-        add_if_present("Type", mod_type)
-
-        engine_details = []
-        def add_if_present_local(label, value):
-             if value:
-                engine_details.append(f"{label}: {value}")
-
-        if engine_type or engine_configuration or engine_displacement or engine_power:  # Check if any engine detail is present
+        _kv(desc_parts, "Brand", brand)
+        _kv(desc_parts, "Body Style", body_style)
+        _kv(desc_parts, "Years", f"{years_min}-{years_max}" if years_min and years_max else years_min or years_max) # Handle single year
+        _kv(desc_parts, "Country", country)
+        _kv(desc_parts, "Derby Class", derby_class)
+        _kv(desc_parts, "Type", mod_type)
+
+        engine_details = [f"{label}: {value}" for label, value in (
+            ("Type", engine_type), ("Configuration", engine_configuration),
+            ("Displacement", engine_displacement), ("Power", engine_power)) if value]
+        if engine_details:
             desc_parts.append("\nEngine Details:")
-            add_if_present_local("Type", engine_type)
-            add_if_present_local("Configuration", engine_configuration)
-            add_if_present_local("Displacement", engine_displacement)
-            add_if_present_local("Power", engine_power)
             desc_parts.extend(engine_details)
-            if not engine_details:
-                desc_parts.append("N/A")
-
 
-        trans_details = []
-        def add_if_present_local(label, value):
-             if value:
-                trans_details.append(f"{label}: {value}")
-        if transmission_type or transmission_gears:
+        trans_details = [f"{label}: {value}" for label, value in (
+            ("Type", transmission_type), ("Gears", transmission_gears)) if value]
+        if trans_details:
             desc_parts.append("\nTransmission:")
-            add_if_present_local("Type", transmission_type)
-            add_if_present_local("Gears", transmission_gears)
             desc_parts.extend(trans_details)
-            if not trans_details:
-                desc_parts.append("N/A")
-
 
         return "\n".join(desc_parts)
 
     @staticmethod
     def _format_vehicle_description(info: Dict) -> str:
-        logger.debug(f"Formatting vehicle description for: {info.get('Name', 'Unknown')}")
+        logger.debug("Formatting vehicle description for: %s", info.get('Name', 'Unknown'))
         desc_parts = [
             f"Brand: {info.get('Brand', 'N/A')}",
             f"Body Style: {info.get('Body Style', 'N/A')}",
@@ -234,7 +559,7 @@ class ModAnalyzer:
 
         if 'Engine' in info:
             engine = info['Engine']
-            logger.debug(f"Engine details: {engine}")
+            logger.debug("Engine details: %s", engine)
             desc_parts.extend([
                 "\nEngine Details:",
                 f"Type: {engine.get('Type', 'N/A')}",
@@ -245,7 +570,7 @@ class ModAnalyzer:
 
         if 'Transmission' in info:
             trans = info['Transmission']
-            logger.debug(f"Transmission details: {trans}")
+            logger.debug("Transmission details: %s", trans)
             desc_parts.extend([
                 "\nTransmission:",
                 f"Type: {trans.get('Type', 'N/A')}",
@@ -253,68 +578,79 @@ class ModAnalyzer:
             ])
 
         description = "\n".join(desc_parts)
-        logger.debug(f"Formatted description: {description}")
+        logger.debug("Formatted description: %s", description)
         return description
 
     @staticmethod
-    def _check_map_mod(zf: zipfile.ZipFile, file_list: List[str]) -> Optional[ModInfo]:
+    def _check_map_mod(zf: zipfile.ZipFile, index: ZipIndex) -> Optional[ModInfo]:
         """Check if zip contains map mod structure and extract info"""
-        logger.debug(f"Checking for map mod in {zf.filename}")
-        info_file = next((name for name in file_list
-                          if 'levels' in name.split('/') and 'info.json' in name), None)
+        logger.debug("Checking for map mod in %s", zf.filename)
+        info_file = index.map_info_file
+        file_set = index.file_set
 
         if not info_file:
             logger.debug("No map info.json file found.")
             return None
 
-        logger.debug(f"Found map info.json: {info_file}")
+        logger.debug("Found map info.json: %s", info_file)
 
         try:
             with zf.open(info_file) as f:
-                file_content = f.read().decode('utf-8', 'ignore')
+                buf = f.read()
+            info = decode_map_info(buf)
+            if info is not None:
+                title = as_text(info.title)
+                authors = as_text(info.authors)
+                biome = as_text(info.biome)
+                description = as_text(info.description)
+                roads = as_list(info.roads)
+                suitablefor = as_list(info.suitablefor)
+                size = [as_text(v) or "N/A" for v in info.size[:2]]
+                size += ["N/A"] * (2 - len(size))
+                previews = info.previews
+            else:
 
-            # Extract relevant info using regex
-            title = ModAnalyzer._extract_value_from_json_string(file_content, 'title')
-            authors = ModAnalyzer._extract_value_from_json_string(file_content, 'authors')
-            biome = ModAnalyzer._extract_value_from_json_string(file_content, 'biome')
-            description = ModAnalyzer._extract_value_from_json_string(file_content, 'description')
-            roads_str = ModAnalyzer._extract_value_from_json_string(file_content, 'roads')
-            suitablefor_str = ModAnalyzer._extract_value_from_json_string(file_content, 'suitablefor')
+                # Extract relevant info using regex
+                title = ModAnalyzer._extract_value_from_json_string(buf, 'title')
+                authors = ModAnalyzer._extract_value_from_json_string(buf, 'authors')
+                biome = ModAnalyzer._extract_value_from_json_string(buf, 'biome')
+                description = ModAnalyzer._extract_value_from_json_string(buf, 'description')
+                roads_str = ModAnalyzer._extract_value_from_json_string(buf, 'roads')
+                suitablefor_str = ModAnalyzer._extract_value_from_json_string(buf, 'suitablefor')
 
-            roads = [s.strip() for s in roads_str.split(',')] if roads_str else []
-            suitablefor = [s.strip() for s in suitablefor_str.split(',')] if suitablefor_str else []
+                roads = [s.strip() for s in roads_str.split(',')] if roads_str else []
+                suitablefor = [s.strip() for s in suitablefor_str.split(',')] if suitablefor_str else []
 
-            size_x = ModAnalyzer._extract_value_from_json_string(file_content, '0', section='size')
-            size_y = ModAnalyzer._extract_value_from_json_string(file_content, '1', section='size')
+                size_x = ModAnalyzer._extract_value_from_json_string(buf, '0', section='size')
+                size_y = ModAnalyzer._extract_value_from_json_string(buf, '1', section='size')
 
-            size_x = size_x if size_x else "N/A"
-            size_y = size_y if size_y else "N/A"
+                size_x = size_x if size_x else "N/A"
+                size_y = size_y if size_y else "N/A"
 
-            size = [size_x, size_y]
-            previews_str = ModAnalyzer._extract_value_from_json_string(file_content, 'previews')
+                size = [size_x, size_y]
+                previews_str = ModAnalyzer._extract_value_from_json_string(buf, 'previews')
 
-            previews = []
-            if previews_str:
-                previews = [s.strip().replace('"', '') for s in previews_str.strip('[]').split(',')]
+                previews = []
+                if previews_str:
+                    previews = [s.strip().replace('"', '') for s in previews_str.strip('[]').split(',')]
 
 
         except Exception as e:
             logger.exception(f"Error in _check_map_mod")
-            return ModAnalyzer._create_fallback_mod_info(zf, info_file, ModType.MAP, str(e))
+            return ModAnalyzer._create_fallback_mod_info(zf, index, info_file, ModType.MAP, str(e))
 
-        preview_images = []
-        base_dir = os.path.dirname(info_file)
+        base_dir = posixpath.dirname(info_file)
+        preview_entries = []
 
         if previews:
             for preview in previews:
-                preview_path = os.path.join(base_dir, preview)
-                if preview_path in file_list:
-                    try:
-                        with zf.open(preview_path) as img:
-                            preview_images.append((os.path.basename(preview), img.read()))
-                            logger.debug(f"Found map preview image: {preview_path}")
-                    except Exception as e:
-                        logger.warning(f"Could not load preview image {preview_path}: {e}")
+                preview_path = posixpath.join(base_dir, preview)
+                if preview_path in file_set:
+                    logger.debug("Found map preview image: %s", preview_path)
+                    preview_entries.append((posixpath.basename(preview), preview_path))
+
+        preview_images = ModAnalyzer._lazy_previews(
+            zf, preview_entries, ModAnalyzer._read_eager_previews(zf, preview_entries))
 
         mod_info = ModInfo(
             name=title or 'Unknown Map',
@@ -345,24 +681,17 @@ class ModAnalyzer:
                                             suitablefor: List[str]) -> str:
         """Formats the map description from extracted values."""
         desc_parts = []
-
-        def add_if_present(label: str, value: str):
-            if value:
-                desc_parts.append(f"{label}: {value}")
-            else:
-                desc_parts.append(f"{label}: N/A")
-
-        add_if_present("Biome", biome)
-        add_if_present("Size", ' x '.join(size) if size else 'N/A')
-        add_if_present("\nDescription", description)
-        add_if_present("\nRoads", ', '.join(roads) if roads else 'N/A')
-        add_if_present("Suitable for", ', '.join(suitablefor) if suitablefor else 'N/A')
+        _kv(desc_parts, "Biome", biome)
+        _kv(desc_parts, "Size", ' x '.join(size) if size else 'N/A')
+        _kv(desc_parts, "\nDescription", description)
+        _kv(desc_parts, "\nRoads", ', '.join(roads) if roads else 'N/A')
+        _kv(desc_parts, "Suitable for", ', '.join(suitablefor) if suitablefor else 'N/A')
 
         return "\n".join(desc_parts)
 
     @staticmethod
     def _format_map_description(info: Dict) -> str:
-        logger.debug(f"Formatting map description for: {info.get('title', 'Unknown Map')}")
+        logger.debug("Formatting map description for: %s", info.get('title', 'Unknown Map'))
         desc_parts = [
             f"Biome: {info.get('biome', 'N/A')}",
             f"Size: {' x '.join(map(str, info.get('size', ['N/A', 'N/A'])))}",
@@ -371,39 +700,32 @@ class ModAnalyzer:
             f"Suitable for: {', '.join(info.get('suitablefor', ['N/A']))}"
         ]
         description = "\n".join(desc_parts)
-        logger.debug(f"Formatted description: {description}")
+        logger.debug("Formatted description: %s", description)
         return description
 
     @staticmethod
-    def _create_other_mod_info(zf: zipfile.ZipFile, file_list: List[str]) -> ModInfo:
-        logger.debug(f"Creating 'other' mod info for: {zf.filename}")
-        info_file = next((name for name in file_list if name.endswith('info.json')), None)
+    def _create_other_mod_info(zf: zipfile.ZipFile, index: ZipIndex) -> ModInfo:
+        logger.debug("Creating 'other' mod info for: %s", zf.filename)
+        info_file = index.generic_info_file
         info = {}
 
+        image_files = index.image_files
+        logger.debug("Image files: %s", image_files)
         if info_file:
-            logger.debug(f"Found info.json: {info_file}")
+            logger.debug("Found info.json: %s", info_file)
             try:
-                with zf.open(info_file) as f:
-                    info = json.load(f)
-                    logger.debug(f"Loaded info.json: {info}")
+                info = ModAnalyzer._load_json(zf, info_file)
+                logger.debug("Loaded info.json: %s", info)
             except json.JSONDecodeError as e:
                 logger.warning(f"JSONDecodeError in _create_other_mod_info: {e}")
-                return ModAnalyzer._create_fallback_mod_info(zf, info_file, ModType.OTHER, str(e))
+                return ModAnalyzer._create_fallback_mod_info(zf, index, info_file, ModType.OTHER, str(e))
             except Exception as e:
                 logger.exception(f"Error in _create_other_mod_info")
-                return ModAnalyzer._create_fallback_mod_info(zf, info_file, ModType.OTHER, str(e))
+                return ModAnalyzer._create_fallback_mod_info(zf, index, info_file, ModType.OTHER, str(e))
 
-        preview_images = []
-        image_files = [f for f in file_list if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        logger.debug(f"Image files: {image_files}")
-        for img_file in image_files[:3]:
-            try:
-                with zf.open(img_file) as img:
-                    data = img.read()
-                    logger.debug(f"Found image {img_file} with {len(data)} bytes")
-                    preview_images.append((os.path.basename(img_file), data))
-            except Exception as e:
-                logger.warning(f"Could not load image {img_file}: {e}")
+        preview_entries = [(posixpath.basename(img_file), img_file) for img_file in image_files]
+        preview_images = ModAnalyzer._lazy_previews(
+            zf, preview_entries, ModAnalyzer._read_eager_previews(zf, preview_entries))
 
 
         mod_info = ModInfo(
@@ -419,44 +741,35 @@ class ModAnalyzer:
         return mod_info
 
     @staticmethod
-    def _create_fallback_mod_info(zf: zipfile.ZipFile, info_file_path: str, mod_type: ModType,
-                                  error_message: str) -> ModInfo:
-        """Creates a ModInfo object when JSON parsing fails."""
+    def _create_fallback_mod_info(zf: zipfile.ZipFile, index: Optional[ZipIndex], info_file_path: str,
+                                  mod_type: ModType, error_message: str) -> ModInfo:
+        """Creates a ModInfo object when JSON parsing fails, reusing the caller's index when there is one."""
         logger.error(f"Creating fallback ModInfo for {zf.filename} due to: {error_message}")
 
-        try:
-            mod_name = os.path.basename(zf.filename).replace(".zip", "")  # Fallback name
-        except:
-            mod_name = "Unknown Mod"
+        mod_name = os.path.splitext(os.path.basename(zf.filename or ""))[0] or "Unknown Mod"
 
         preview_images = []
-        base_dir = os.path.dirname(info_file_path) if info_file_path else ""
-        file_list = zf.namelist()
-
-        for image_ext in ('.png', '.jpg', '.jpeg'):
-            if info_file_path:
-                potential_image_path = os.path.join(base_dir, "preview" + image_ext).replace('\\', '/')
-                if potential_image_path in file_list:
-                    try:
-                        with zf.open(potential_image_path) as img:
-                            preview_images.append((os.path.basename(potential_image_path), img.read()))
-                            logger.debug(f"Found fallback image {potential_image_path}")
-                            if len(preview_images) >= 3:
-                                break
-                    except Exception as e:
-                        logger.warning(f"Could not load fallback image {potential_image_path}: {e}")
-
-            if len(preview_images) < 3:
-                for file_name in file_list:
-                    if file_name.lower().endswith(image_ext):
-                        try:
-                            with zf.open(file_name) as img:
-                                preview_images.append((os.path.basename(file_name), img.read()))
-                                logger.debug(f"Found fallback image {file_name}")
-                                if len(preview_images) >= 3:
-                                    break
-                        except Exception as e:
-                            logger.warning(f"Could not load fallback image {file_name}: {e}")
+        base_dir = posixpath.dirname(info_file_path) if info_file_path else ""
+        if index is None:
+            index = ModAnalyzer._index_zip(zf.namelist())
+        file_set = index.file_set
+
+        preview_names = []
+        if info_file_path:
+            for image_ext in ('png', 'jpg', 'jpeg'):
+                potential_image_path = posixpath.join(base_dir, "preview." + image_ext)
+                if potential_image_path in file_set:
+                    preview_names.append(potential_image_path)
+        preview_names.extend(f for f in index.image_files if f not in preview_names)
+
+        for image_name in preview_names[:MAX_GENERIC_PREVIEWS]:
+            try:
+                data = make_thumbnail(ModAnalyzer._read_entry(zf, image_name))
+            except Exception as e:
+                logger.warning(f"Could not read {image_name}: {e}")
+                continue
+            preview_images.append((posixpath.basename(image_name), LazyBytes(zf.filename, image_name, data)))
+            logger.debug("Found fallback image %s", image_name)
 
 
         mod_info = ModInfo(
@@ -465,7 +778,8 @@ class ModAnalyzer:
             type=mod_type,
             description=f"Error parsing info.json: {error_message}\n\nCould not load mod details.",
             preview_images=preview_images,
-            additional_info={}
+            additional_info={},
+            is_error=True
         )
         logger.info(f"Created fallback mod info: {mod_info.name}".encode('utf-8').decode('ascii', errors='ignore'))
         return mod_info
\ No newline at end of file
@@ -1,20 +1,83 @@
+import atexit
+import functools
+import hashlib
 import json
 import os
+import shutil
+import tempfile
+import threading
 import time
+import weakref
 from typing import Dict, Optional, Any
 from config.app_config import AppConfig
+from core.mod_info import ModInfo, ModType, LazyBytes
 from utils.logger import logger
 
-CACHE_VERSION = 1
+try:
+    # pip install orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+CACHE_VERSION = 2
+MOD_INFO_SECTION = "_mod_info"
+
+# Every live ModCache, flushed once at interpreter exit without keeping the instances alive
+_instances: "weakref.WeakSet[ModCache]" = weakref.WeakSet()
+
+
+def _flush_all():
+    for cache in list(_instances):
+        cache.flush()
+
+
+atexit.register(_flush_all)
+
+# One instance per cache file, handed out by ModCache.shared()
+_shared: Dict[str, "ModCache"] = {}
+_shared_lock = threading.Lock()
+
+
+def _locked(method):
+    """Runs a ModCache method under the instance lock; the UI and marking threads share one cache."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class ModCache:
     """Manages an external cache for mod analysis results."""
 
-    def __init__(self, cache_file_path: str = AppConfig.CACHE_FILE_PATH):
+    def __init__(self, cache_file_path: str = AppConfig.CACHE_FILE_PATH,
+                 preview_dir: str = AppConfig.CACHE_PREVIEW_DIR,
+                 max_entries: int = AppConfig.CACHE_MAX_ENTRIES,
+                 save_interval: int = AppConfig.CACHE_SAVE_INTERVAL):
         self.cache_file_path = cache_file_path
+        self.preview_dir = preview_dir
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._dirty_count = 0
         self.cache_data: Dict[str, Dict[str, Any]] = self._load_cache()
+        self._remove_orphan_previews()
+        _instances.add(self)
         logger.info(f"ModCache initialized. Loaded {len(self.cache_data)} entries from {self.cache_file_path}")
 
+    @classmethod
+    def shared(cls, cache_file_path: str = AppConfig.CACHE_FILE_PATH,
+               preview_dir: str = AppConfig.CACHE_PREVIEW_DIR) -> "ModCache":
+        """
+        Returns the ModCache for cache_file_path, creating it on first use, so several
+        managers never hold (and flush) competing copies of the same file.
+        """
+        key = os.path.abspath(cache_file_path)
+        with _shared_lock:
+            cache = _shared.get(key)
+            if cache is None:
+                cache = _shared[key] = cls(cache_file_path, preview_dir)
+            return cache
+
     def _load_cache(self) -> dict[str, int] | Any:
         """Loads cache data from the JSON file."""
         if not os.path.exists(self.cache_file_path):
@@ -22,14 +85,15 @@ class ModCache:
             return {"_version": CACHE_VERSION}
 
         try:
-            with open(self.cache_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if data.get("_version") != CACHE_VERSION:
-                    logger.warning(f"Cache file version mismatch (expected {CACHE_VERSION}, found {data.get('_version')}). Discarding old cache.")
-                    return {"_version": CACHE_VERSION}
-                if "_version" in data:
-                    del data["_version"]
-                return data
+            with open(self.cache_file_path, 'rb') as f:
+                raw = f.read()
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            if data.get("_version") != CACHE_VERSION:
+                logger.warning(f"Cache file version mismatch (expected {CACHE_VERSION}, found {data.get('_version')}). Discarding old cache.")
+                return {"_version": CACHE_VERSION}
+            if "_version" in data:
+                del data["_version"]
+            return data
         except json.JSONDecodeError as e:
             logger.error(f"Error decoding cache file {self.cache_file_path}: {e}. Starting with empty cache.")
             return {"_version": CACHE_VERSION}
@@ -37,16 +101,64 @@ class ModCache:
             logger.exception(f"Failed to load cache file {self.cache_file_path}: {e}. Starting with empty cache.")
             return {"_version": CACHE_VERSION}
 
+    @_locked
+    def _remove_orphan_previews(self):
+        """
+        Deletes preview folders no index entry points to. They are left behind when the
+        process exits before the index written after store_mod_info or _evict is saved.
+        """
+        entries = self.cache_data.get(MOD_INFO_SECTION, {})
+        try:
+            with os.scandir(self.preview_dir) as listing:
+                orphans = [entry.path for entry in listing if entry.is_dir() and entry.name not in entries]
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Could not scan preview cache {self.preview_dir}: {e}")
+            return
+        for path in orphans:
+            shutil.rmtree(path, ignore_errors=True)
+        if orphans:
+            logger.info(f"Removed {len(orphans)} orphaned preview folders from {self.preview_dir}")
+
+    @_locked
     def _save_cache(self):
-        """Saves the current cache data to the JSON file."""
+        """Saves the current cache data to the JSON file, replacing it atomically."""
+        tmp_path = None
         try:
             save_data = {"_version": CACHE_VERSION, **self.cache_data}
-            with open(self.cache_file_path, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
-            logger.debug(f"Cache saved successfully to {self.cache_file_path}")
+            if orjson is not None:
+                payload = orjson.dumps(save_data)
+            else:
+                payload = json.dumps(save_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            cache_dir = os.path.dirname(os.path.abspath(self.cache_file_path))
+            tmp_fd, tmp_path = tempfile.mkstemp(suffix='.tmp', prefix=os.path.basename(self.cache_file_path) + '.',
+                                                dir=cache_dir)
+            with os.fdopen(tmp_fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.cache_file_path)
+            tmp_path = None
+            self._dirty_count = 0
+            logger.debug("Cache saved successfully to %s", self.cache_file_path)
         except Exception as e:
             logger.exception(f"Failed to save cache file {self.cache_file_path}: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _mark_dirty(self):
+        """Records a change and saves once save_interval changes have piled up."""
+        self._dirty_count += 1
+        if self._dirty_count >= self.save_interval:
+            self._save_cache()
 
+    @_locked
+    def flush(self):
+        """Writes pending changes to disk. Also runs at interpreter exit."""
+        if self._dirty_count:
+            self._save_cache()
+
+    @_locked
     def get_cached_info(self, filename: str, file_mod_time: Optional[float]) -> Optional[Dict[str, Any]]:
         """
         Gets cached info for a file if it exists and the modification time matches.
@@ -63,20 +175,21 @@ class ModCache:
             cached_mod_time = cached_entry.get('mod_time')
 
             if file_mod_time is not None and cached_mod_time is not None and abs(file_mod_time - cached_mod_time) < 1e-6:
-                logger.debug(f"Cache hit for '{filename}'.")
+                logger.debug("Cache hit for '%s'.", filename)
                 return cached_entry
             elif file_mod_time is None or cached_mod_time is None:
-                 logger.debug(f"Cache hit for '{filename}', but modification time missing. Treating as valid (re-analysis might be needed if file changed).")
+                 logger.debug("Cache hit for '%s', but modification time missing. Treating as valid (re-analysis might be needed if file changed).", filename)
                  return cached_entry
             else:
                 logger.info(f"Cache outdated for '{filename}' (mod time mismatch: file={file_mod_time}, cache={cached_mod_time}). Needs re-analysis.")
                 return None
-        logger.debug(f"Cache miss for '{filename}'.")
+        logger.debug("Cache miss for '%s'.", filename)
         return None
 
+    @_locked
     def update_cache(self, filename: str, file_mod_time: Optional[float], mod_info_dict: Dict[str, Any]):
         """
-        Updates or adds an entry to the cache and saves it.
+        Updates or adds an entry to the cache. Writes are batched; see flush().
 
         Args:
             filename: The base name of the zip file.
@@ -84,20 +197,181 @@ class ModCache:
             mod_info_dict: A dictionary containing the basic info to cache
                            (e.g., {'name': ..., 'author': ..., 'type': ..., 'analyzed_time': ...}).
         """
-        logger.debug(f"Updating cache for '{filename}'.")
+        logger.debug("Updating cache for '%s'.", filename)
         entry = mod_info_dict.copy()
         entry['mod_time'] = file_mod_time
         entry['analyzed_time'] = time.time()
         self.cache_data[filename] = entry
-        self._save_cache()
+        self._mark_dirty()
 
+    @_locked
     def remove_from_cache(self, filename: str):
-        """Removes an entry from the cache (e.g., if the file is deleted) and saves."""
+        """Removes an entry from the cache (e.g., if the file is deleted)."""
         if filename in self.cache_data:
-            logger.debug(f"Removing '{filename}' from cache.")
+            logger.debug("Removing '%s' from cache.", filename)
             del self.cache_data[filename]
-            self._save_cache()
+            self._mark_dirty()
 
     def is_analyzed(self, filename: str, file_mod_time: Optional[float]) -> bool:
         """Checks if a file has a valid, up-to-date entry in the cache."""
-        return self.get_cached_info(filename, file_mod_time) is not None
\ No newline at end of file
+        return self.get_cached_info(filename, file_mod_time) is not None
+
+    @staticmethod
+    def make_key(zip_path: str, mtime_ns: Optional[int] = None, size: Optional[int] = None) -> Optional[str]:
+        """
+        Builds the ModInfo cache key from the zip's absolute path, mtime and size.
+        The file is only stat'ed when the caller doesn't already know mtime_ns and size.
+        """
+        if mtime_ns is None or size is None:
+            try:
+                stats = os.stat(zip_path)
+            except OSError as e:
+                logger.warning(f"Could not stat {zip_path} to build cache key: {e}")
+                return None
+            mtime_ns, size = stats.st_mtime_ns, stats.st_size
+        raw = f"{os.path.abspath(zip_path)}\0{mtime_ns}\0{size}"
+        return hashlib.blake2b(raw.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+    def _mod_info_entries(self) -> Dict[str, Dict[str, Any]]:
+        return self.cache_data.setdefault(MOD_INFO_SECTION, {})
+
+    def _preview_file(self, key: str, image_index: int) -> str:
+        return os.path.join(self.preview_dir, key, f"{image_index}.bin")
+
+    def _evict(self, key: str):
+        """Drops a ModInfo entry and its preview files."""
+        self._mod_info_entries().pop(key, None)
+        shutil.rmtree(os.path.join(self.preview_dir, key), ignore_errors=True)
+
+    @_locked
+    def rekey_mod_info(self, old_key: Optional[str], zip_path: str):
+        """
+        Moves a ModInfo entry to the zip's current key after a change that leaves the
+        analysis result valid (appending the sorted marker), so the zip is not re-analyzed.
+
+        Args:
+            old_key: The key returned by make_key before the zip was changed.
+            zip_path: Path to the changed zip file.
+        """
+        new_key = self.make_key(zip_path)
+        entries = self._mod_info_entries()
+        if old_key is None or new_key is None or old_key == new_key or old_key not in entries:
+            return
+
+        try:
+            old_dir = os.path.join(self.preview_dir, old_key)
+            if os.path.isdir(old_dir):
+                os.replace(old_dir, os.path.join(self.preview_dir, new_key))
+        except OSError as e:
+            logger.warning(f"Could not move cached previews for '{zip_path}': {e}")
+            self._evict(old_key)
+            self._mark_dirty()
+            return
+
+        entries[new_key] = entries.pop(old_key)
+        logger.debug("Re-keyed ModInfo cache entry for '%s'.", zip_path)
+        self._mark_dirty()
+
+    @_locked
+    def get_mod_info(self, zip_path: str, mtime_ns: Optional[int] = None,
+                     size: Optional[int] = None) -> Optional[ModInfo]:
+        """
+        Returns the cached analysis result for a zip if the file is unchanged.
+
+        Args:
+            zip_path: Path to the zip file.
+            mtime_ns, size: The zip's stat values, if the caller already has them.
+
+        Returns:
+            The cached ModInfo, or None on a miss. Previews that were inflated at analysis
+            time come back from disk; the others stay lazy references into the zip.
+        """
+        key = self.make_key(zip_path, mtime_ns, size)
+        if key is None:
+            return None
+
+        entry = self._mod_info_entries().get(key)
+        if entry is None:
+            logger.debug("ModInfo cache miss for '%s'.", zip_path)
+            return None
+
+        try:
+            preview_images = []
+            for image_index, (image_name, member_name, stored) in enumerate(entry['previews']):
+                data = None
+                if stored:
+                    with open(self._preview_file(key, image_index), 'rb') as f:
+                        data = f.read()
+                preview_images.append((image_name, LazyBytes(zip_path, member_name, data)))
+
+            mod_info = ModInfo(
+                name=entry['name'],
+                author=entry['author'],
+                type=ModType(entry['type']),
+                description=entry['description'],
+                preview_images=preview_images,
+                additional_info=entry['additional_info']
+            )
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning(f"Discarding broken ModInfo cache entry for '{zip_path}': {e}")
+            self._evict(key)
+            self._mark_dirty()
+            return None
+
+        # Kept in memory for eviction order; saved along with the next real change
+        entry['accessed'] = time.time()
+        logger.debug("ModInfo cache hit for '%s'.", zip_path)
+        return mod_info
+
+    @_locked
+    def store_mod_info(self, zip_path: str, mod_info: ModInfo, mtime_ns: Optional[int] = None,
+                       size: Optional[int] = None):
+        """
+        Stores an analysis result, writing already-inflated preview bytes to separate files
+        under preview_dir (lazy previews are stored as entry names only).
+        The least recently used entries are evicted once max_entries is exceeded.
+        Error placeholders are not stored, so a failed analysis is retried next time.
+
+        Args:
+            zip_path: Path to the analyzed zip file.
+            mod_info: The analysis result to cache.
+            mtime_ns, size: The stat values of the zip version that was analyzed.
+        """
+        if mod_info.is_error:
+            logger.debug("Not caching error result for '%s'.", zip_path)
+            return
+        key = self.make_key(zip_path, mtime_ns, size)
+        if key is None:
+            return
+
+        entry_dir = os.path.join(self.preview_dir, key)
+        try:
+            os.makedirs(entry_dir, exist_ok=True)
+            for image_index, (_, image_data) in enumerate(mod_info.preview_images):
+                if image_data.is_loaded:
+                    with open(self._preview_file(key, image_index), 'wb') as f:
+                        f.write(image_data())
+        except OSError as e:
+            logger.warning(f"Could not write cached previews for '{zip_path}': {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return
+
+        entries = self._mod_info_entries()
+        entries[key] = {
+            'name': mod_info.name,
+            'author': mod_info.author,
+            'type': mod_info.type.value,
+            'description': mod_info.description,
+            'previews': [[image_name, image_data.member_name, image_data.is_loaded]
+                         for image_name, image_data in mod_info.preview_images],
+            'additional_info': mod_info.additional_info,
+            'accessed': time.time()
+        }
+
+        if len(entries) > self.max_entries:
+            by_age = sorted(entries, key=lambda k: entries[k].get('accessed', 0))
+            for old_key in by_age[:len(entries) - self.max_entries]:
+                logger.debug("Evicting ModInfo cache entry %s.", old_key)
+                self._evict(old_key)
+
+        self._mark_dirty()
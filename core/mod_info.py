@@ -1,6 +1,11 @@
+import threading
+import zipfile
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from enum import Enum
+from config.app_config import AppConfig
+from utils.image_utils import make_thumbnail_from_file
 
 
 class ModType(Enum):
@@ -9,11 +14,65 @@ class ModType(Enum):
     OTHER = "Other"
 
 
+# Previews inflated on demand; only the most recently loaded ones keep their bytes
+_loaded_previews: "OrderedDict[int, LazyBytes]" = OrderedDict()
+_loaded_previews_lock = threading.Lock()
+
+
+def _remember_loaded(preview: "LazyBytes"):
+    with _loaded_previews_lock:
+        _loaded_previews.pop(id(preview), None)
+        _loaded_previews[id(preview)] = preview
+        while len(_loaded_previews) > AppConfig.LAZY_PREVIEW_CACHE_SIZE:
+            _, oldest = _loaded_previews.popitem(last=False)
+            oldest._data = None
+
+
+class LazyBytes:
+    """
+    Preview image stored in a zip entry, inflated and downscaled on the first call.
+    Only the last AppConfig.LAZY_PREVIEW_CACHE_SIZE previews loaded this way keep
+    their bytes; older ones are re-read on their next call. `data`, when given,
+    must already be display-sized and is kept for the object's lifetime.
+    """
+
+    def __init__(self, zip_path: str, member_name: str, data: Optional[bytes] = None):
+        self.zip_path = zip_path
+        self.member_name = member_name
+        self._data = data
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
+
+    def __call__(self) -> bytes:
+        data = self._data
+        if data is None:
+            with zipfile.ZipFile(self.zip_path, 'r') as zf, zf.open(self.member_name) as src:
+                data = self._data = make_thumbnail_from_file(src)
+            _remember_loaded(self)
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LazyBytes):
+            return NotImplemented
+        return (self.zip_path, self.member_name) == (other.zip_path, other.member_name)
+
+    def __hash__(self) -> int:
+        return hash((self.zip_path, self.member_name))
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "pending"
+        return f"LazyBytes({self.zip_path!r}, {self.member_name!r}, {state})"
+
+
 @dataclass
 class ModInfo:
     name: str
     author: str
     type: ModType
     description: str
-    preview_images: List[Tuple[str, bytes]]
-    additional_info: Dict
\ No newline at end of file
+    preview_images: List[Tuple[str, LazyBytes]]
+    additional_info: Dict
+    # Set on placeholder results for zips that couldn't be analyzed; these are never cached
+    is_error: bool = False
@@ -1,32 +1,206 @@
+import copy
+import errno
+import functools
 import os
 import shutil
+import struct
 import zipfile
 import json
 import tempfile
+import threading
 import time
-from typing import List, Optional, Dict, Any
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Tuple
+from config.app_config import AppConfig
 from core.mod_info import ModInfo, ModType
 from utils.logger import logger
 from core.mod_analyzer import ModAnalyzer
+from core.mod_cache import ModCache
+
+try:
+    # pip install orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+# ZIP end-of-central-directory record and central directory file header
+_EOCD = struct.Struct('<4s4H2LH')
+_CDFH = struct.Struct('<4s6H3L5H2L')
+_LFH = struct.Struct('<4s5H3L2H')
+_EOCD_SIG = b'PK\x05\x06'
+_CDFH_SIG = b'PK\x01\x02'
+_LFH_SIG = b'PK\x03\x04'
+_ZIP64_LOCATOR_SIG = b'PK\x06\x07'
+
+
+# One tail read covers the EOCD record, the central directory of nearly every mod, and
+# usually the marker entry appended right before it
+_TAIL_READ_SIZE = 256 * 1024
+# Chunk size for copying entries when a zip has to be rewritten
+_COPY_BUFFER_SIZE = 1024 * 1024
+SCAN_CACHE_VERSION = 1
+
+
+@dataclass
+class _CentralDirectory:
+    file_size: int
+    cd_offset: int
+    data: bytes
+    comment: bytes
+    tail_start: int
+    tail: bytes
+
+    def read(self, f, offset: int, size: int) -> bytes:
+        """Reads size bytes at offset, from the tail buffer when it covers them."""
+        if offset >= self.tail_start and offset + size <= self.tail_start + len(self.tail):
+            start = offset - self.tail_start
+            return self.tail[start:start + size]
+        f.seek(offset)
+        return f.read(size)
+
+
+def _read_central_directory(f) -> Optional[_CentralDirectory]:
+    """
+    Reads the central directory of an open ZIP straight from its EOCD record.
+
+    Returns:
+        The directory, or None if the archive is ZIP64, spanned, or has data before
+        or around its central directory.
+    """
+    file_size = f.seek(0, os.SEEK_END)
+    if file_size > 0xFFFFFFFF:
+        return None
+    tail_start = max(0, file_size - _TAIL_READ_SIZE)
+    f.seek(tail_start)
+    tail = f.read()
+    eocd_pos = tail.rfind(_EOCD_SIG, max(0, len(tail) - _EOCD.size - 0xFFFF))
+    if eocd_pos < 0 or eocd_pos + _EOCD.size > len(tail):
+        return None
+    (_, disk_no, cd_disk, disk_entries, total_entries,
+     cd_size, cd_offset, comment_len) = _EOCD.unpack_from(tail, eocd_pos)
+    if disk_no or cd_disk or disk_entries != total_entries or total_entries == 0xFFFF:
+        return None
+    if eocd_pos >= 20 and tail[eocd_pos - 20:eocd_pos - 16] == _ZIP64_LOCATOR_SIG:
+        return None
+    if cd_offset + cd_size != tail_start + eocd_pos:
+        return None
+    comment = tail[eocd_pos + _EOCD.size:eocd_pos + _EOCD.size + comment_len]
+    directory = _CentralDirectory(file_size, cd_offset, b'', comment, tail_start, tail)
+    directory.data = directory.read(f, cd_offset, cd_size)
+    return directory
+
+
+def _iter_cd_records(cd: bytes):
+    """Yields (record_start, name_start, name_end, record_end, local_header_offset) per entry."""
+    pos = 0
+    while pos < len(cd):
+        if cd[pos:pos + 4] != _CDFH_SIG:
+            raise zipfile.BadZipFile("Bad central directory file header signature")
+        fields = _CDFH.unpack_from(cd, pos)
+        name_start = pos + _CDFH.size
+        name_end = name_start + fields[10]
+        record_end = name_end + fields[11] + fields[12]
+        yield pos, name_start, name_end, record_end, fields[16]
+        pos = record_end
+
+
+def _zip_contains(zip_file_path: str, entry_name: str) -> Optional[bool]:
+    """
+    Checks for an entry by scanning the central directory names, without building ZipInfo
+    objects. Returns None when the layout isn't handled here and zipfile should decide.
+    """
+    needle = entry_name.encode('utf-8')
+    with open(zip_file_path, 'rb') as f:
+        directory = _read_central_directory(f)
+    if directory is None:
+        return None
+    cd = memoryview(directory.data)
+    try:
+        for _, name_start, name_end, _, _ in _iter_cd_records(cd):
+            if cd[name_start:name_end] == needle:
+                return True
+    except (zipfile.BadZipFile, struct.error):
+        return None
+    return False
+
+
+def _read_zip_entry(zip_file_path: str, entry_name: str) -> Tuple[Optional[bool], Optional[bytes]]:
+    """
+    Reads a small stored or deflated entry using only the central directory and its local
+    header, without building ZipInfo objects.
+
+    Returns:
+        (found, data); (None, None) when the archive or entry isn't handled here
+        (ZIP64, encrypted, other compression methods) and zipfile should read it.
+    """
+    needle = entry_name.encode('utf-8')
+    with open(zip_file_path, 'rb') as f:
+        directory = _read_central_directory(f)
+        if directory is None:
+            return None, None
+        cd = directory.data
+        try:
+            record = next((_CDFH.unpack_from(cd, start) for start, name_start, name_end, _, _
+                           in _iter_cd_records(cd) if cd[name_start:name_end] == needle), None)
+        except (zipfile.BadZipFile, struct.error):
+            return None, None
+        if record is None:
+            return False, None
+
+        flags, method, crc, compress_size, file_size, local_offset = (
+            record[3], record[4], record[7], record[8], record[9], record[16])
+        if flags & 0x1 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            return None, None
+        header = directory.read(f, local_offset, _LFH.size)
+        if len(header) != _LFH.size or header[:4] != _LFH_SIG:
+            raise zipfile.BadZipFile(f"Bad local file header for {entry_name}")
+        local = _LFH.unpack(header)
+        data = directory.read(f, local_offset + _LFH.size + local[9] + local[10], compress_size)
+
+    if method == zipfile.ZIP_DEFLATED:
+        data = zlib.decompress(data, -zlib.MAX_WBITS)
+    if len(data) != file_size or zlib.crc32(data) != crc:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for {entry_name}")
+    return True, data
+
+
+@functools.lru_cache(maxsize=4096)
+def _zip_marker_state(zip_file_path: str, mtime_ns: int, size: int) -> Tuple[bool, Optional[bytes]]:
+    """
+    Returns (is_sorted, raw marker bytes). zipfile is only used for archives the direct
+    reader doesn't handle. mtime_ns and size only key the cache, so a changed file is read again.
+    """
+    is_sorted, marker_content = _read_zip_entry(zip_file_path, '.mod_sorted')
+    if is_sorted is not None:
+        return is_sorted, marker_content
+    with zipfile.ZipFile(zip_file_path, 'r') as zf:
+        if '.mod_sorted' not in zf.NameToInfo:
+            return False, None
+        return True, zf.read('.mod_sorted')
+
+
+def _marker_state(zip_file_path: str) -> Tuple[bool, Optional[bytes]]:
+    stats = os.stat(zip_file_path)
+    return _zip_marker_state(zip_file_path, stats.st_mtime_ns, stats.st_size)
+
 
 def get_mod_info_from_marker(zip_file_path: str) -> Optional[dict]:
     """Reads the .mod_sorted file from inside the ZIP and returns the data."""
-    logger.debug(f"Reading mod info from marker in: {zip_file_path}")
+    logger.debug("Reading mod info from marker in: %s", zip_file_path)
     try:
-        with zipfile.ZipFile(zip_file_path, 'r') as zf:
-            marker_filename = '.mod_sorted'
-            if marker_filename in zf.namelist():
-                with zf.open(marker_filename) as marker_file:
-                    try:
-                        data = json.load(marker_file)
-                        logger.debug(f"Marker data: {data}")
-                        return data
-                    except json.JSONDecodeError as json_e:
-                        logger.warning(f"Error decoding JSON from marker in {zip_file_path}: {json_e}")
-                        return None
-            else:
-                logger.debug("No sorted marker found.")
-                return None
+        is_sorted, marker_content = _marker_state(zip_file_path)
+        if not is_sorted:
+            logger.debug("No sorted marker found.")
+            return None
+        try:
+            data = orjson.loads(marker_content) if orjson is not None else json.loads(marker_content)
+            logger.debug("Marker data: %s", data)
+            return data
+        except json.JSONDecodeError as json_e:
+            logger.warning(f"Error decoding JSON from marker in {zip_file_path}: {json_e}")
+            return None
     except zipfile.BadZipFile:
         logger.warning(f"Bad zip file encountered while reading marker: {zip_file_path}")
         return None
@@ -38,36 +212,158 @@ def get_mod_info_from_marker(zip_file_path: str) -> Optional[dict]:
         return None
 
 
+def _remove_entry_in_place(zip_file_path: str, entry_name: str) -> Optional[bool]:
+    """
+    Removes an entry from a ZIP by rewriting only its central directory and EOCD record.
+    Entry data is never moved: the removed entry's local header and data become dead
+    space, or are truncated away when they are the last entry in the file.
+
+    The new directory is first appended after the old one, so the file is a valid zip at
+    every step, and then moved down over the old directory before truncating.
+
+    Returns:
+        True if the entry was removed, False if the archive doesn't contain it, or None if
+        the archive is ZIP64, spanned or has data around its central directory; the caller
+        should then fall back to zipfile and a full rewrite.
+    """
+    needle = entry_name.encode('utf-8')
+    with open(zip_file_path, 'r+b') as f:
+        directory = _read_central_directory(f)
+        if directory is None:
+            return None
+        file_size, cd_offset, cd, comment = directory.file_size, directory.cd_offset, directory.data, directory.comment
+
+        kept = []
+        entry_offset = None
+        last_other_offset = -1
+        try:
+            for start, name_start, name_end, end, local_offset in _iter_cd_records(cd):
+                if entry_offset is None and cd[name_start:name_end] == needle:
+                    entry_offset = local_offset
+                else:
+                    kept.append(cd[start:end])
+                    last_other_offset = max(last_other_offset, local_offset)
+        except (zipfile.BadZipFile, struct.error):
+            return None
+        if entry_offset is None:
+            return False
+
+        new_cd = b''.join(kept)
+
+        def eocd_at(offset: int) -> bytes:
+            return _EOCD.pack(_EOCD_SIG, 0, 0, len(kept), len(kept),
+                              len(new_cd), offset, len(comment)) + comment
+
+        f.seek(file_size)
+        f.write(new_cd + eocd_at(file_size))
+        f.flush()
+        os.fsync(f.fileno())
+
+        # Reclaim the entry's bytes when nothing follows it but the old directory
+        write_pos = entry_offset if entry_offset > last_other_offset else cd_offset
+        f.seek(write_pos)
+        f.write(new_cd + eocd_at(write_pos))
+        f.truncate()
+    return True
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Drops the ZIP64 extra field; zipfile writes a fresh one when the entry needs it."""
+    kept = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, pos)
+        if header_id != 0x0001:
+            kept.append(extra[pos:pos + 4 + size])
+        pos += 4 + size
+    return b''.join(kept)
+
+
+def _copy_entry_raw(source: zipfile.ZipFile, target: zipfile.ZipFile, item: zipfile.ZipInfo) -> None:
+    """
+    Copies an entry's compressed bytes into target unchanged, so unchanged mod files are
+    never inflated and deflated again. Uses the ZipFile attributes its own writers
+    maintain (fp, filelist, NameToInfo, start_dir).
+    """
+    source.fp.seek(item.header_offset)
+    header = source.fp.read(_LFH.size)
+    if len(header) != _LFH.size or header[:4] != _LFH_SIG:
+        raise zipfile.BadZipFile(f"Bad local file header for {item.filename}")
+    local = _LFH.unpack(header)
+    source.fp.seek(local[9] + local[10], os.SEEK_CUR)
+
+    zinfo = copy.copy(item)
+    zinfo.extra = _strip_zip64_extra(item.extra)
+    if not zinfo.flag_bits & 0x1:
+        # Sizes and CRC go into the local header, so no data descriptor is copied
+        # (encrypted entries keep the flag, since their password check depends on it)
+        zinfo.flag_bits &= ~0x08
+    zinfo.header_offset = target.fp.tell()
+    target.fp.write(zinfo.FileHeader())
+
+    remaining = item.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, _COPY_BUFFER_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated data for {item.filename}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+
+    target.filelist.append(zinfo)
+    target.NameToInfo[zinfo.filename] = zinfo
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
 def _delete_sorted_marker(zip_file_path: str) -> None:
     """Deletes the .mod_sorted marker file from *inside* the ZIP."""
-    logger.debug(f"Attempting to delete sorted marker from: {zip_file_path}")
+    logger.debug("Attempting to delete sorted marker from: %s", zip_file_path)
     temp_zip_path = None
     try:
         marker_filename = '.mod_sorted'
-        marker_exists = False
+        # The in-place patch reads the central directory itself, so the common case opens the file once
         try:
-             with zipfile.ZipFile(zip_file_path, 'r') as zf_check:
-                 marker_exists = marker_filename in zf_check.namelist()
-        except (zipfile.BadZipFile, FileNotFoundError) as check_err:
-             logger.warning(f"Could not check for marker before deletion in {zip_file_path}: {check_err}")
-             return
+            removed = _remove_entry_in_place(zip_file_path, marker_filename)
+        except FileNotFoundError as check_err:
+            logger.warning(f"Could not check for marker before deletion in {zip_file_path}: {check_err}")
+            return
+        except OSError as patch_err:
+            logger.warning(f"In-place marker removal failed for {zip_file_path}, rewriting instead: {patch_err}")
+            removed = None
+
+        if removed:
+            logger.info(f"Successfully deleted {marker_filename} from {zip_file_path}")
+            return
 
-        if not marker_exists:
-             logger.debug(f"Marker {marker_filename} not found in {zip_file_path}. No need to delete.")
+        if removed is False:
+             logger.debug("Marker %s not found in %s. No need to delete.", marker_filename, zip_file_path)
              return
 
-        logger.debug(f"Marker found. Proceeding with deletion via rewrite for {zip_file_path}")
-        temp_zip_fd, temp_zip_path = tempfile.mkstemp(suffix='.zip')
-        os.close(temp_zip_fd)
+        # Layout the in-place patch doesn't handle: one ZipFile both checks and feeds the rewrite
+        try:
+            original_zip = zipfile.ZipFile(zip_file_path, 'r')
+        except (zipfile.BadZipFile, FileNotFoundError) as check_err:
+            logger.warning(f"Could not check for marker before deletion in {zip_file_path}: {check_err}")
+            return
+
+        with original_zip:
+            if marker_filename not in original_zip.NameToInfo:
+                logger.debug("Marker %s not found in %s. No need to delete.", marker_filename, zip_file_path)
+                return
+
+            logger.debug("Marker found. Proceeding with deletion via rewrite for %s", zip_file_path)
+            # Same folder as the zip, so os.replace is a rename rather than a cross-volume copy
+            temp_zip_fd, temp_zip_path = tempfile.mkstemp(suffix='.zip', prefix='.modsort_',
+                                                          dir=os.path.dirname(os.path.abspath(zip_file_path)))
+            os.close(temp_zip_fd)
 
-        with zipfile.ZipFile(zip_file_path, 'r') as original_zip:
             with zipfile.ZipFile(temp_zip_path, 'w', zipfile.ZIP_DEFLATED) as temp_zip:
                 for item in original_zip.infolist():
                     if item.filename != marker_filename:
-                        buffer = original_zip.read(item.filename)
-                        temp_zip.writestr(item, buffer)
+                        _copy_entry_raw(original_zip, temp_zip, item)
 
         os.replace(temp_zip_path, zip_file_path)
+        temp_zip_path = None
         logger.info(f"Successfully deleted {marker_filename} from {zip_file_path}")
 
     except FileNotFoundError:
@@ -76,22 +372,81 @@ def _delete_sorted_marker(zip_file_path: str) -> None:
         logger.error(f"Bad zip file during marker deletion process: {zip_file_path}")
     except Exception as e:
         logger.exception(f"Error removing {marker_filename} from {zip_file_path}: {e}")
+        raise
+    finally:
         if temp_zip_path and os.path.exists(temp_zip_path):
             try:
                 os.remove(temp_zip_path)
             except OSError as remove_err:
                 logger.warning(f"Could not remove temporary file {temp_zip_path} after error: {remove_err}")
-        raise
+
+
+def _clone_file(source_path: str, target_path: str) -> None:
+    """
+    Copies a file's bytes. On Linux copy_file_range is tried first, which lets reflink-capable
+    filesystems (Btrfs, XFS) share the extents instead of copying them.
+    """
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is not None:
+        try:
+            with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError as e:
+            logger.debug("copy_file_range failed for %s (%s); copying normally.", source_path, e)
+    shutil.copyfile(source_path, target_path)
+
+
+def _append_entry(zip_file_path: str, entry_name: str, data: bytes) -> bool:
+    """Appends a stored entry to the zip in place. Returns False if the entry already exists."""
+    # One open both checks for an existing entry and appends the new one
+    with zipfile.ZipFile(zip_file_path, 'a') as zf:
+        if entry_name in zf.NameToInfo:
+            return False
+        # The marker is a few hundred bytes; deflating it would only cost time
+        zf.writestr(entry_name, data, compress_type=zipfile.ZIP_STORED)
+    return True
+
+
+def _append_entry_atomic(zip_file_path: str, entry_name: str, data: bytes) -> bool:
+    """
+    Same as _append_entry, but appends to a copy that then replaces the zip, so a crash
+    mid-write can't leave the original with a torn central directory.
+    """
+    if _zip_contains(zip_file_path, entry_name):
+        return False
+    temp_zip_fd, temp_zip_path = tempfile.mkstemp(suffix='.zip', prefix='.modsort_',
+                                                  dir=os.path.dirname(os.path.abspath(zip_file_path)))
+    os.close(temp_zip_fd)
+    try:
+        _clone_file(zip_file_path, temp_zip_path)
+        shutil.copymode(zip_file_path, temp_zip_path)
+        if not _append_entry(temp_zip_path, entry_name, data):
+            return False
+        # Windows can only flush a handle opened for writing
+        with open(temp_zip_path, 'r+b') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_zip_path, zip_file_path)
+        temp_zip_path = None
+        return True
+    finally:
+        if temp_zip_path is not None and os.path.exists(temp_zip_path):
+            os.remove(temp_zip_path)
 
 
 def check_sorted_marker(zip_file_path: str) -> bool:
     """Checks if a .mod_sorted marker exists *inside* the ZIP."""
-    logger.debug(f"Checking for sorted marker in: {zip_file_path}")
+    logger.debug("Checking for sorted marker in: %s", zip_file_path)
     try:
-        with zipfile.ZipFile(zip_file_path, 'r') as zf:
-            is_sorted = '.mod_sorted' in zf.namelist()
-            logger.debug(f"Sorted marker found in {zip_file_path}: {is_sorted}")
-            return is_sorted
+        is_sorted, _ = _marker_state(zip_file_path)
+        logger.debug("Sorted marker found in %s: %s", zip_file_path, is_sorted)
+        return is_sorted
     except zipfile.BadZipFile:
         logger.warning(f"Bad zip file encountered while checking for marker: {zip_file_path}")
         return False
@@ -103,46 +458,223 @@ def check_sorted_marker(zip_file_path: str) -> bool:
         return False
 
 class ModManager:
+    __slots__ = ('source_folder', 'mod_cache', '_sorted_lock',
+                 '_sorted_executor', '_mark_executor', '_pending_marks', '_pending_lock',
+                 'zip_files_info', '_path_to_index', '_folder_mtimes', 'current_index')
+
     def __init__(self, source_folder: str):
-        logger.debug(f"Initializing ModManager with source folder: {source_folder}")
+        logger.debug("Initializing ModManager with source folder: %s", source_folder)
         self.source_folder = source_folder
-        self.zip_files_info: List[Dict[str, Any]] = self._load_zip_files_with_info()
+        self.mod_cache = ModCache.shared()
+        # Guards zip_files_info and _path_to_index, which the prefetch and marking threads also use
+        self._sorted_lock = threading.Lock()
+        self._sorted_executor: Optional[ThreadPoolExecutor] = None
+        self._mark_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mark-async")
+        self._pending_marks: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._folder_mtimes: Dict[str, int] = {}
+        saved_files = self._load_saved_scan()
+        self.zip_files_info: List[Dict[str, Any]] = (saved_files if saved_files is not None
+                                                     else self._load_zip_files_with_info())
+        self._path_to_index: Dict[str, int] = {}
+        self._reindex()
         self.current_index = 0
+        self._prefetch_sorted_states()
         logger.info(f"ModManager initialized, found {len(self.zip_files_info)} zip files.")
 
     def _load_zip_files_with_info(self) -> List[Dict[str, Any]]:
-        """Loads zip files and basic stats (name, path, size, modified time) recursively from the source folder."""
-        logger.debug(f"Recursively loading zip files and info from: {self.source_folder}")
+        """
+        Loads zip file names and paths recursively from the source folder. Size and modified
+        time start as None and are filled by the background prefetch or on first use.
+        """
+        logger.debug("Recursively loading zip files and info from: %s", self.source_folder)
         files_info = []
+        self._folder_mtimes = {}
         try:
-            for root, dirs, files in os.walk(self.source_folder):
-                for filename in files:
-                    if filename.lower().endswith('.zip'):
-                        full_path = os.path.join(root, filename)
-                        try:
-                            stats = os.stat(full_path)
-                            files_info.append({
-                                "name": filename,
-                                "path": full_path,
-                                "size": stats.st_size,
-                                "modified": stats.st_mtime
-                            })
-                        except OSError as e:
-                            logger.warning(f"Could not get stats for {full_path}: {e}")
-                            files_info.append({"name": filename, "path": full_path, "size": None, "modified": None})
-
+            self._scan_zip_files(self.source_folder, files_info, top_level=True)
         except FileNotFoundError:
             logger.error(f"Source folder not found during loading: {self.source_folder}")
+            self._folder_mtimes = {}
             return []
         except Exception as e:
             logger.exception(f"Error loading zip files list from {self.source_folder}: {e}")
+            self._folder_mtimes = {}
             return []
 
-        logger.debug(f"Found {len(files_info)} zip files with info.")
+        logger.debug("Found %s zip files with info.", len(files_info))
         # Сортируем файлы по имени для консистентного порядка
         files_info.sort(key=lambda x: x['name'].lower())
+        self._save_scan(files_info)
+        return files_info
+
+    def _load_saved_scan(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the file list saved by the last scan of this source folder, or None if there is
+        none or any of its folders has changed since (see _folders_unchanged).
+        """
+        try:
+            with open(AppConfig.SCAN_CACHE_FILE_PATH, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Could not read scan cache {AppConfig.SCAN_CACHE_FILE_PATH}: {e}")
+            return None
+
+        try:
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            if data.get("_version") != SCAN_CACHE_VERSION or data.get("source_folder") != self.source_folder:
+                logger.debug("Scan cache is for another folder or version; rescanning.")
+                return None
+            folder_mtimes = {folder: int(mtime_ns) for folder, mtime_ns in data["folders"].items()}
+            files_info = [{"name": name, "path": path, "size": None, "modified": None, "sorted": None}
+                          for name, path in data["files"]]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Discarding unreadable scan cache {AppConfig.SCAN_CACHE_FILE_PATH}: {e}")
+            return None
+
+        self._folder_mtimes = folder_mtimes
+        if not self._folders_unchanged():
+            logger.debug("Source folders changed since the saved scan; rescanning.")
+            self._folder_mtimes = {}
+            return None
+        logger.info(f"Loaded {len(files_info)} zip files from the scan cache.")
         return files_info
 
+    def _save_scan(self, files_info: List[Dict[str, Any]]) -> None:
+        """Saves the scanned names, paths and folder mtimes, replacing the scan cache atomically."""
+        tmp_path = AppConfig.SCAN_CACHE_FILE_PATH + '.tmp'
+        data = {
+            "_version": SCAN_CACHE_VERSION,
+            "source_folder": self.source_folder,
+            "folders": self._folder_mtimes,
+            "files": [[info["name"], info["path"]] for info in files_info]
+        }
+        try:
+            if orjson is not None:
+                payload = orjson.dumps(data)
+            else:
+                payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, AppConfig.SCAN_CACHE_FILE_PATH)
+        except Exception as e:
+            logger.warning(f"Could not save scan cache {AppConfig.SCAN_CACHE_FILE_PATH}: {e}")
+
+    def _scan_zip_files(self, folder: str, files_info: List[Dict[str, Any]], top_level: bool = False) -> None:
+        """
+        Appends the zip files under folder to files_info, recursing into subfolders.
+        Uses os.scandir so file types come from the directory listing instead of extra stat calls.
+        """
+        subfolders = []
+        try:
+            # Taken before listing, so a change made during the scan still shows up as a new mtime
+            self._folder_mtimes[folder] = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subfolders.append(entry.path)
+                            continue
+                        # Lowercase only the suffix, not the whole name
+                        if entry.name[-4:].lower() == '.zip' and entry.is_file():
+                            files_info.append({"name": entry.name, "path": entry.path, "size": None,
+                                               "modified": None, "sorted": None})
+                    except OSError as e:
+                        logger.warning(f"Could not read directory entry {entry.path}: {e}")
+        except OSError as e:
+            if top_level:
+                raise
+            logger.warning(f"Could not scan folder {folder}: {e}")
+            return
+
+        for subfolder in subfolders:
+            self._scan_zip_files(subfolder, files_info)
+
+    def _prefetch_sorted_states(self) -> None:
+        """
+        Fills each file's "sorted" flag and stats (None until known) on background threads,
+        so the UI rarely has to stat or open a zip just to show it or decide whether to skip it.
+        """
+        if self._sorted_executor is not None:
+            self._sorted_executor.shutdown(wait=False, cancel_futures=True)
+        # The work is IO-bound: many concurrent reads hide disk latency
+        self._sorted_executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4),
+                                                   thread_name_prefix="marker-scan")
+        for info in self.zip_files_info:
+            self._sorted_executor.submit(self._fill_sorted_state, info)
+
+    def _fill_sorted_state(self, info: Dict[str, Any]) -> None:
+        try:
+            stats = os.stat(info["path"])
+        except OSError as e:
+            logger.debug("Could not prefetch stats for %s: %s", info["path"], e)
+            return
+        with self._sorted_lock:
+            if info.get("modified") is None:
+                info["size"], info["modified"] = stats.st_size, stats.st_mtime
+        # Same lookup as check_sorted_marker, so this also warms its cache
+        try:
+            is_sorted, _ = _zip_marker_state(info["path"], stats.st_mtime_ns, stats.st_size)
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.debug("Could not prefetch marker state for %s: %s", info["path"], e)
+            return
+        with self._sorted_lock:
+            if info.get("sorted") is None:
+                info["sorted"] = is_sorted
+
+    def _set_sorted_state(self, zip_file_path: str, is_sorted: bool) -> None:
+        """Records a file's marker state together with its current stats, which the change just altered."""
+        try:
+            stats = os.stat(zip_file_path)
+        except OSError:
+            stats = None
+        with self._sorted_lock:
+            index = self._index_of(zip_file_path)
+            if index != -1:
+                info = self.zip_files_info[index]
+                info["sorted"] = is_sorted
+                if stats is not None:
+                    info["size"], info["modified"] = stats.st_size, stats.st_mtime
+
+    def _known_sorted(self, zip_file_path: str) -> bool:
+        """True if the list already records a marker for the file and its mtime hasn't changed since."""
+        with self._sorted_lock:
+            index = self._index_of(zip_file_path)
+            if index == -1 or self.zip_files_info[index].get("sorted") is not True:
+                return False
+            modified = self.zip_files_info[index].get("modified")
+        try:
+            return os.stat(zip_file_path).st_mtime == modified
+        except OSError:
+            return False
+
+    def is_current_sorted(self) -> bool:
+        """
+        Returns whether the current file has a sorted marker. The prefetched or remembered
+        state is reused while the file's mtime matches the listing; a changed file is checked again.
+        """
+        if not 0 <= self.current_index < len(self.zip_files_info):
+            return False
+        info = self.zip_files_info[self.current_index]
+        self._wait_for_pending_mark(info["path"])
+        is_sorted = info.get("sorted")
+        try:
+            stats = os.stat(info["path"])
+        except OSError:
+            stats = None
+        if stats is not None and stats.st_mtime != info.get("modified"):
+            if info.get("modified") is not None:
+                logger.debug("%s changed since it was listed; checking its marker again.", info["path"])
+                is_sorted = None
+            with self._sorted_lock:
+                info["size"], info["modified"] = stats.st_size, stats.st_mtime
+        if is_sorted is None:
+            is_sorted = check_sorted_marker(info["path"])
+            with self._sorted_lock:
+                info["sorted"] = is_sorted
+        return is_sorted
+
     # def _load_zip_files(self) -> List[str]:
     #     logger.debug(f"Loading zip files from: {self.source_folder}")
     #     zip_files = [f for f in os.listdir(self.source_folder) if f.endswith('.zip')]
@@ -156,11 +688,20 @@ class ModManager:
         return None
 
     def get_current_file_stats(self) -> Optional[Dict[str, Any]]:
-        """Returns size and modified time for the current file."""
+        """Returns size and modified time for the current file, stat'ing it if the prefetch hasn't yet."""
         if 0 <= self.current_index < len(self.zip_files_info):
+            info = self.zip_files_info[self.current_index]
+            if info.get("modified") is None:
+                try:
+                    stats = os.stat(info["path"])
+                except OSError as e:
+                    logger.warning(f"Could not get stats for {info['path']}: {e}")
+                else:
+                    with self._sorted_lock:
+                        info["size"], info["modified"] = stats.st_size, stats.st_mtime
             return {
-                "size": self.zip_files_info[self.current_index].get("size"),
-                "modified": self.zip_files_info[self.current_index].get("modified")
+                "size": info.get("size"),
+                "modified": info.get("modified")
             }
         logger.warning(f"Index {self.current_index} out of bounds. Cannot get stats.")
         return None
@@ -173,48 +714,36 @@ class ModManager:
 
         if not os.path.exists(zip_file_path):
             logger.warning(f"File no longer exists: {zip_file_path}. Refreshing list.")
-            self.refresh_zip_list()
+            self.refresh_zip_list(force=True)
             zip_file_path = self.get_current_zip_file_path()
             if not zip_file_path:
                  logger.error("Could not find a valid file after refresh.")
                  return None
 
+        self._wait_for_pending_mark(zip_file_path)
         try:
-            mod_info = ModAnalyzer.analyze_zip(zip_file_path)
+            mod_info = ModAnalyzer.analyze_zip(zip_file_path, cache=self.mod_cache)
             return mod_info
         except Exception as e:
             logger.error(f"Error analyzing {zip_file_path}: {e}")
-            fallback_name = os.path.basename(zip_file_path) if zip_file_path else "Unknown File"
+            fallback_name = self._file_name(zip_file_path) if zip_file_path else "Unknown File"
             return ModInfo(name=f"Error Loading ({fallback_name})", author="Unknown", type=ModType.OTHER,
                            description=f"Failed to analyze mod: {e}", preview_images=[], additional_info={})
 
     def mark_as_sorted(self, zip_file_path: str, mod_info: ModInfo) -> None:
         """Adds a .mod_sorted marker file inside the ZIP archive using append mode."""
-        logger.info(f"--- Entering mark_as_sorted for {zip_file_path} (APPEND MODE) ---")
         start_time = time.time()
 
         if not mod_info:
             logger.warning(f"Cannot mark {zip_file_path} as sorted: mod_info is None.")
-            logger.info(f"--- Exiting mark_as_sorted (mod_info is None) for {zip_file_path} ---")
             return
 
-        marker_filename = '.mod_sorted'
-
-        logger.debug("--- Checking for existing marker before append ---")
-        try:
-            if check_sorted_marker(zip_file_path):
-                logger.info(f"--- Marker already exists in {zip_file_path}. Skipping append. ---")
-                end_time_skip = time.time()
-                logger.info(
-                    f"--- Exiting mark_as_sorted (marker exists, check took {end_time_skip - start_time:.4f}s) for {zip_file_path} ---")
-                return
-        except Exception as check_err:
-            logger.error(f"--- Error checking marker for {zip_file_path}: {check_err}. Aborting mark. ---",
-                         exc_info=True)
-            logger.info(f"--- Exiting mark_as_sorted (check error) for {zip_file_path} ---")
+        if self._known_sorted(zip_file_path):
+            logger.debug("Marker already recorded for %s. Skipping append.", zip_file_path)
             return
 
-        logger.debug("--- Marker not found. Proceeding to append. ---")
+        marker_filename = '.mod_sorted'
+
         marker_data = {
             "name": mod_info.name,
             "author": mod_info.author,
@@ -222,22 +751,27 @@ class ModManager:
             "timestamp": time.time()
         }
         try:
-            marker_content = json.dumps(marker_data, indent=2, ensure_ascii=False).encode('utf-8')
+            if orjson is not None:
+                marker_content = orjson.dumps(marker_data)
+            else:
+                marker_content = json.dumps(marker_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
         except Exception as json_err:
             logger.error(f"--- Failed to encode marker data to JSON: {json_err} ---", exc_info=True)
-            logger.info(f"--- Exiting mark_as_sorted (JSON encode error) for {zip_file_path} ---")
             return
 
-        logger.info(f"--- Starting append process for {zip_file_path} ---")
+        cache_key = ModCache.make_key(zip_file_path)
         try:
-            with zipfile.ZipFile(zip_file_path, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
-                logger.debug(f"--- Writing marker '{marker_filename}'... ---")
-                zf.writestr(marker_filename, marker_content)
-                logger.debug(f"--- Marker written. ---")
+            append = _append_entry_atomic if AppConfig.ATOMIC_MARKER_APPEND else _append_entry
+            if not append(zip_file_path, marker_filename, marker_content):
+                logger.debug("Marker already exists in %s. Skipping append.", zip_file_path)
+                self._set_sorted_state(zip_file_path, True)
+                return
+            self._set_sorted_state(zip_file_path, True)
 
             end_time = time.time()
             logger.info(
                 f"--- Successfully marked {zip_file_path} using APPEND mode (took {end_time - start_time:.2f}s) ---")
+            self.mod_cache.rekey_mod_info(cache_key, zip_file_path)
 
         except FileNotFoundError:
             logger.error(f"--- File not found during append for {zip_file_path} ---", exc_info=True)
@@ -245,77 +779,147 @@ class ModManager:
             logger.error(f"--- Bad zip file during append for {zip_file_path} ---", exc_info=True)
         except Exception as e:
             logger.exception(f"--- Append method FAILED for {zip_file_path}. Error: {e} ---")
-        finally:
-            logger.info(f"--- Exiting mark_as_sorted (finally block or end of try) for {zip_file_path} ---")
 
-    def _update_internal_list_after_change(self, changed_file_name: str, is_deleted: bool):
+    def mark_as_sorted_async(self, zip_file_path: str, mod_info: ModInfo) -> Future:
+        """
+        Runs mark_as_sorted on a background thread so the UI can move on to the next mod.
+        Later reads, moves and deletes of the same file wait for it to finish.
+        """
+        self._wait_for_pending_mark(zip_file_path)
+        future = self._mark_executor.submit(self.mark_as_sorted, zip_file_path, mod_info)
+        with self._pending_lock:
+            self._pending_marks[zip_file_path] = future
+        future.add_done_callback(lambda done: self._forget_pending_mark(zip_file_path, done))
+        return future
+
+    def _forget_pending_mark(self, zip_file_path: str, future: Future) -> None:
+        with self._pending_lock:
+            if self._pending_marks.get(zip_file_path) is future:
+                del self._pending_marks[zip_file_path]
+
+    def _wait_for_pending_mark(self, zip_file_path: Optional[str] = None) -> None:
+        """Blocks until a queued mark of zip_file_path (or of every file, if None) is written."""
+        with self._pending_lock:
+            if zip_file_path is None:
+                pending = list(self._pending_marks.values())
+            else:
+                pending = [self._pending_marks[zip_file_path]] if zip_file_path in self._pending_marks else []
+        if pending:
+            logger.debug("Waiting for %s pending marker write(s).", len(pending))
+            wait(pending)
+
+    def mark_batch_as_sorted(self, items: List[Tuple[str, ModInfo]]) -> None:
+        """
+        Marks several mods as sorted. Each append is IO-bound, so they run on a thread pool;
+        a path listed more than once is only marked once.
+        """
+        pending = dict(items)
+        if not pending:
+            return
+        logger.info(f"Marking {len(pending)} mods as sorted...")
+        with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 4) * 2, len(pending)),
+                                thread_name_prefix="mark-sorted") as executor:
+            list(executor.map(lambda item: self.mark_as_sorted(*item), pending.items()))
+
+    def _reindex(self, start: int = 0) -> None:
+        """Refreshes the path -> index map for entries from start on, after a load or removal."""
+        for i in range(start, len(self.zip_files_info)):
+            self._path_to_index[self.zip_files_info[i]['path']] = i
+
+    def _index_of(self, zip_file_path: str) -> int:
+        index = self._path_to_index.get(zip_file_path, -1)
+        if 0 <= index < len(self.zip_files_info) and self.zip_files_info[index]['path'] == zip_file_path:
+            return index
+        return -1
+
+    def _file_name(self, zip_file_path: str) -> str:
+        """The listed name of a zip, without re-splitting its path when it is in the list."""
+        index = self._index_of(zip_file_path)
+        return self.zip_files_info[index]['name'] if index != -1 else os.path.basename(zip_file_path)
+
+    def _update_internal_list_after_change(self, changed_file_name: str, is_deleted: bool,
+                                           zip_file_path: Optional[str] = None):
         """Helper to update self.zip_files_info and current_index after move/delete."""
         original_index = -1
-        for i, info in enumerate(self.zip_files_info):
-            if info['name'] == changed_file_name:
-                original_index = i
-                break
+        if zip_file_path is not None:
+            original_index = self._index_of(zip_file_path)
+        else:
+            for i, info in enumerate(self.zip_files_info):
+                if info['name'] == changed_file_name:
+                    original_index = i
+                    break
 
         if original_index != -1:
-            del self.zip_files_info[original_index]
-            logger.debug(f"Removed {changed_file_name} from internal list at index {original_index}.")
+            with self._sorted_lock:
+                removed_info = self.zip_files_info.pop(original_index)
+                self._path_to_index.pop(removed_info['path'], None)
+                self._reindex(original_index)
+            logger.debug("Removed %s from internal list at index %s.", changed_file_name, original_index)
 
 
             if self.current_index >= original_index:
                  if self.current_index >= len(self.zip_files_info):
                      self.current_index = max(0, len(self.zip_files_info) - 1)
-                     logger.debug(f"Adjusted current index to {self.current_index} (last element or 0).")
+                     logger.debug("Adjusted current index to %s (last element or 0).", self.current_index)
 
         else:
              logger.warning(f"{changed_file_name} not found in internal list for update.")
-             self.refresh_zip_list()
+             self.refresh_zip_list(force=True)
 
     def move_mod(self, zip_file_path: str, destination_path: str) -> None:
         """Moves a mod to the specified directory."""
-        logger.debug(f"Moving {zip_file_path} to {destination_path}")
-        moved_file_name = os.path.basename(zip_file_path)
+        logger.debug("Moving %s to %s", zip_file_path, destination_path)
+        moved_file_name = self._file_name(zip_file_path)
         start_time = time.time()
+        self._wait_for_pending_mark(zip_file_path)
         try:
+            # Checked on every move: the user may delete or rename the folder while the app runs
             os.makedirs(destination_path, exist_ok=True)
             dest_file_path = os.path.join(destination_path, moved_file_name)
 
             try:
-                os.rename(zip_file_path, dest_file_path)
+                os.replace(zip_file_path, dest_file_path)
                 logger.info(f"Moved (renamed) {zip_file_path} to {dest_file_path}")
             except OSError as e:
-                logger.warning(f"os.rename failed ({e}), falling back to shutil.move for {zip_file_path}")
+                if e.errno != errno.EXDEV:
+                    raise
+                logger.warning(f"os.replace failed ({e}), falling back to shutil.move for {zip_file_path}")
                 shutil.move(zip_file_path, dest_file_path)
                 logger.info(f"Moved (shutil.move) {zip_file_path} to {dest_file_path}")
 
-            self._update_internal_list_after_change(moved_file_name, is_deleted=False)
+            self._update_internal_list_after_change(moved_file_name, is_deleted=False, zip_file_path=zip_file_path)
 
         except Exception as e:
             logger.exception(f"Failed to move {zip_file_path} to {destination_path}: {e}")
             if not os.path.exists(zip_file_path):
-                self._update_internal_list_after_change(moved_file_name, is_deleted=False)
+                self._update_internal_list_after_change(moved_file_name, is_deleted=False, zip_file_path=zip_file_path)
             raise
         finally:
             end_time = time.time()
-            logger.debug(f"Move operation for {moved_file_name} took {end_time - start_time:.2f}s")
+            logger.debug("Move operation for %s took %.2fs", moved_file_name, end_time - start_time)
             
     def delete_mod(self, zip_file_path: str) -> None:
         """Deletes the specified mod."""
-        logger.debug(f"Deleting {zip_file_path}")
-        file_name_to_remove = os.path.basename(zip_file_path)
+        logger.debug("Deleting %s", zip_file_path)
+        file_name_to_remove = self._file_name(zip_file_path)
+        self._wait_for_pending_mark(zip_file_path)
         try:
             os.remove(zip_file_path)
             logger.info(f"Deleted {zip_file_path}")
-            self._update_internal_list_after_change(file_name_to_remove, is_deleted=True)
+            self._update_internal_list_after_change(file_name_to_remove, is_deleted=True, zip_file_path=zip_file_path)
 
         except Exception as e:
             logger.exception(f"Failed to delete {zip_file_path}: {e}")
             if not os.path.exists(zip_file_path):
-                 self._update_internal_list_after_change(file_name_to_remove, is_deleted=True)
+                 self._update_internal_list_after_change(file_name_to_remove, is_deleted=True, zip_file_path=zip_file_path)
             raise
 
     def remove_current_zip_file(self) -> None:
         if 0 <= self.current_index < len(self.zip_files_info):
-            removed_file_info = self.zip_files_info.pop(self.current_index)
+            with self._sorted_lock:
+                removed_file_info = self.zip_files_info.pop(self.current_index)
+                self._path_to_index.pop(removed_file_info['path'], None)
+                self._reindex(self.current_index)
             logger.info(f"Removed zip file from list: {removed_file_info['name']}")
              # Корректируем индекс, если удалили последний
             if self.current_index >= len(self.zip_files_info):
@@ -327,7 +931,7 @@ class ModManager:
         """Increments index, returns True if successful, False if at the end."""
         if self.current_index < len(self.zip_files_info) - 1:
             self.current_index += 1
-            logger.debug(f"Index incremented to {self.current_index}")
+            logger.debug("Index incremented to %s", self.current_index)
             return True
         else:
             logger.debug("Already at the last index.")
@@ -337,7 +941,7 @@ class ModManager:
         """Decrements index, returns True if successful, False if at the beginning."""
         if self.current_index > 0:
             self.current_index -= 1
-            logger.debug(f"Index decremented to {self.current_index}")
+            logger.debug("Index decremented to %s", self.current_index)
             return True
         else:
             logger.debug("Already at the first index.")
@@ -356,7 +960,7 @@ class ModManager:
     def set_current_index(self, index: int) -> None:
         if 0 <= index < len(self.zip_files_info):
             self.current_index = index
-            logger.debug(f"Index set to {index}")
+            logger.debug("Index set to %s", index)
         else:
              logger.warning(f"Attempted to set invalid index: {index}. Max index is {len(self.zip_files_info)-1}")
 
@@ -369,11 +973,35 @@ class ModManager:
             return self.zip_files_info[self.current_index]["name"]
         return None
 
-    def refresh_zip_list(self):
-        """Reloads the list of zip files from the source folder."""
+    def _folders_unchanged(self) -> bool:
+        """
+        True if none of the folders seen by the last scan has a new mtime. Adding, removing or
+        renaming a direct child updates a folder's mtime, so an unchanged set means the same zips.
+        """
+        if not self._folder_mtimes:
+            return False
+        try:
+            return all(os.stat(folder).st_mtime_ns == mtime_ns for folder, mtime_ns in self._folder_mtimes.items())
+        except OSError:
+            return False
+
+    def refresh_zip_list(self, force: bool = False):
+        """
+        Reloads the list of zip files from the source folder. Unless force is set, the
+        rescan is skipped when no scanned folder has changed since the last one.
+        """
+        self._wait_for_pending_mark()
+        if not force and self._folders_unchanged():
+            logger.debug("Source folders unchanged since the last scan; keeping the zip file list.")
+            return
         logger.info("Refreshing zip file list from disk...")
         current_path = self.get_current_zip_file_path()
-        self.zip_files_info = self._load_zip_files_with_info()
+        files_info = self._load_zip_files_with_info()
+        with self._sorted_lock:
+            self.zip_files_info = files_info
+            self._path_to_index = {}
+            self._reindex()
+        self._prefetch_sorted_states()
         logger.info(f"Refreshed list, found {len(self.zip_files_info)} files.")
 
         new_index = -1
@@ -385,7 +1013,7 @@ class ModManager:
 
         if new_index != -1:
              self.current_index = new_index
-             logger.debug(f"Restored index to {self.current_index} ({os.path.basename(current_path)}) after refresh.")
+             logger.debug("Restored index to %s (%s) after refresh.", self.current_index, os.path.basename(current_path))
         else:
              self.current_index = min(self.current_index, max(0, len(self.zip_files_info) - 1))
-             logger.debug(f"Could not restore previous file index. Set index to {self.current_index} after refresh.")
\ No newline at end of file
+             logger.debug("Could not restore previous file index. Set index to %s after refresh.", self.current_index)
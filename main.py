@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import ModSorterApp
@@ -9,4 +10,5 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -48,7 +48,7 @@ class NextModHandler(EventHandler):
     def handle(self):
         logger.debug("--- Entering NextModHandler.handle() ---") 
         current_file_path = self.mod_manager.get_current_zip_file_path()
-        logger.debug(f"Current file path: {current_file_path}") 
+        logger.debug("Current file path: %s", current_file_path) 
 
         if not current_file_path:
             logger.warning("No current file path in NextModHandler.")
@@ -74,13 +74,13 @@ class NextModHandler(EventHandler):
              return
 
         try:
-            logger.debug(f"Calling mod_manager.mark_as_sorted for {current_file_path}...") 
-            self.mod_manager.mark_as_sorted(current_file_path, self.current_mod_info)
-            logger.debug(f"Returned from mod_manager.mark_as_sorted for {current_file_path}.") 
+            logger.debug("Queueing mod_manager.mark_as_sorted for %s...", current_file_path) 
+            self.mod_manager.mark_as_sorted_async(current_file_path, self.current_mod_info)
+            logger.debug("Queued mod_manager.mark_as_sorted for %s.", current_file_path) 
 
             logger.debug("Attempting to increment index after marking...") 
             increment_successful = self.mod_manager.increment_index()
-            logger.debug(f"Index increment successful: {increment_successful}") 
+            logger.debug("Index increment successful: %s", increment_successful) 
 
             if increment_successful:
                  logger.debug("Index incremented. Calling load_current_mod for next item...") 
@@ -122,7 +122,7 @@ class DeleteModHandler(EventHandler):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            logger.debug(f"User confirmed deletion of {file_name}")
+            logger.debug("User confirmed deletion of %s", file_name)
             try:
                 self.mod_manager.delete_mod(current_file_path)
                 self.main_window.statusBar().showMessage(f"File {file_name} deleted", 3000)
@@ -166,7 +166,7 @@ class MoveModToFolderHandler(EventHandler):
         self.folder_path = folder_path
 
     def handle(self):
-        logger.debug(f"MoveModToFolderHandler.handle() - Moving to {self.folder_path}")
+        logger.debug("MoveModToFolderHandler.handle() - Moving to %s", self.folder_path)
         current_file_path = self.mod_manager.get_current_zip_file_path()
         if not current_file_path:
             logger.warning("No current file path.")
@@ -14,7 +14,7 @@ from packaging.version import Version, InvalidVersion
 
 from config.app_config import AppConfig
 from core.mod_info import ModInfo, ModType
-from core.mod_manager import ModManager, check_sorted_marker
+from core.mod_manager import ModManager
 from ui.event_handlers import PreviousModHandler, SkipModHandler, NextModHandler, DeleteModHandler, MoveModHandler, \
     MoveModToFolderHandler
 from utils.logger import logger
@@ -102,7 +102,7 @@ class ModSorterApp(QMainWindow):
             base_path = os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'BeamNG.drive')
 
             if not os.path.isdir(base_path):
-                logger.debug(f"BeamNG base path not found at: {base_path}")
+                logger.debug("BeamNG base path not found at: %s", base_path)
                 return None
 
             version_folders = []
@@ -121,7 +121,7 @@ class ModSorterApp(QMainWindow):
 
             version_folders.sort(key=Version, reverse=True)
             latest_version = version_folders[0]
-            logger.debug(f"Found latest version folder: {latest_version}")
+            logger.debug("Found latest version folder: %s", latest_version)
 
             mods_path = os.path.join(base_path, latest_version, 'mods')
             if os.path.isdir(mods_path):
@@ -388,6 +388,7 @@ class ModSorterApp(QMainWindow):
         QShortcut(QKeySequence("Ctrl+K"), self, self.keep_button.click)
         QShortcut(QKeySequence("Ctrl+D"), self, self.delete_button.click)
         QShortcut(QKeySequence("Ctrl+M"), self, self.move_button.click)
+        QShortcut(QKeySequence(Qt.Key.Key_F5), self, self.refresh_mods_clicked)
         QShortcut(QKeySequence(Qt.Key.Key_Left), self, self.show_prev_image)
         QShortcut(QKeySequence(Qt.Key.Key_Right), self, self.show_next_image)
         logger.info("Keyboard shortcuts setup complete")
@@ -419,7 +420,7 @@ class ModSorterApp(QMainWindow):
             image_name, image_data = self.current_mod_info.preview_images[self.current_image_index]
             pixmap = QPixmap()
 
-            if not pixmap.loadFromData(image_data):
+            if not pixmap.loadFromData(image_data()):
                 raise RuntimeError(f"Failed to load image: {image_name}")
 
             scaled_pixmap = pixmap.scaled(
@@ -433,14 +434,14 @@ class ModSorterApp(QMainWindow):
                 f"{self.current_image_index + 1}/{len(self.current_mod_info.preview_images)}"
             )
             self.image_name_label.setText(f"File: {image_name}")
-            logger.debug(f"Displayed image: {image_name}")
+            logger.debug("Displayed image: %s", image_name)
 
         except Exception as e:
             self.handle_error(e, "Image display error")
 
     def _filter_mods(self):
         search_text = self.search_input.text().lower()
-        logger.debug(f"Filtering mods by name: {search_text}")
+        logger.debug("Filtering mods by name: %s", search_text)
         if not search_text:
             self.load_current_mod()
             return
@@ -455,7 +456,7 @@ class ModSorterApp(QMainWindow):
         while current_index < len(zip_files):
             if search_text in zip_files[current_index].lower():
                 self.mod_manager.set_current_index(current_index)
-                logger.debug(f"Found matching mod, setting index to: {current_index}")
+                logger.debug("Found matching mod, setting index to: %s", current_index)
                 self.load_current_mod()
                 return
             current_index += 1
@@ -468,7 +469,7 @@ class ModSorterApp(QMainWindow):
 
     @staticmethod
     def format_additional_info(mod_info: ModInfo) -> str:
-        logger.debug(f"Formatting additional info for mod type: {mod_info.type}")
+        logger.debug("Formatting additional info for mod type: %s", mod_info.type)
         if mod_info.type == ModType.VEHICLE:
             configs = mod_info.additional_info.get('configurations', [])
             paints = mod_info.additional_info.get('paints', {})
@@ -489,7 +490,7 @@ class ModSorterApp(QMainWindow):
                     ])
 
             formatted_info = "\n".join(info_parts)
-            logger.debug(f"Formatted vehicle info: {formatted_info}")
+            logger.debug("Formatted vehicle info: %s", formatted_info)
             return formatted_info
 
         elif mod_info.type == ModType.MAP:
@@ -509,16 +510,16 @@ class ModSorterApp(QMainWindow):
                 f"\nFull Information:\n"
                 f"{json.dumps(info.get('raw_info', {}), indent=2, ensure_ascii=False)}"
             )
-            logger.debug(f"Formatted map info: {formatted_info}")
+            logger.debug("Formatted map info: %s", formatted_info)
             return formatted_info
 
         formatted_info = json.dumps(mod_info.additional_info, indent=2, ensure_ascii=False)
-        logger.debug(f"Formatted other info: {formatted_info}")
+        logger.debug("Formatted other info: %s", formatted_info)
         return formatted_info
 
     def filter_mods(self):
         selected_type = self.mod_type_filter.currentText()
-        logger.debug(f"Filtering mods by type: {selected_type}")
+        logger.debug("Filtering mods by type: %s", selected_type)
         if selected_type == "All":
             self.load_current_mod()
             return
@@ -580,7 +581,7 @@ class ModSorterApp(QMainWindow):
 
         zip_files_count = self.mod_manager.get_zip_files_count()
         current_index = self.mod_manager.get_current_index()
-        logger.debug(f"Zip count: {zip_files_count}, Current index: {current_index}")
+        logger.debug("Zip count: %s, Current index: %s", zip_files_count, current_index)
 
         if zip_files_count == 0:
             logger.info("No zip files found in the source folder.")
@@ -598,7 +599,7 @@ class ModSorterApp(QMainWindow):
                     f"Current index {current_index} is out of bounds (0-{zip_files_count - 1}). Resetting to last.")
                 self.mod_manager.set_current_index(zip_files_count - 1)
                 current_index = self.mod_manager.get_current_index()
-                logger.debug(f"Index reset to {current_index}")
+                logger.debug("Index reset to %s", current_index)
             else:
                 QMessageBox.information(self, "Complete", "All mods have been processed!")
                 logger.info("All files processed.")
@@ -612,7 +613,7 @@ class ModSorterApp(QMainWindow):
         current_file_path = self.mod_manager.get_current_zip_file_path()
         file_name = self.mod_manager.get_current_zip_file_name()
         file_stats = self.mod_manager.get_current_file_stats()
-        logger.debug(f"File path: {current_file_path}")
+        logger.debug("File path: %s", current_file_path)
 
         if not current_file_path or not file_name:
             logger.error("Failed to get current file path or name even though index seems valid.")
@@ -620,13 +621,13 @@ class ModSorterApp(QMainWindow):
             self.statusBar().showMessage("Error loading mod data.")
             if self.mod_manager:
                 logger.debug("Refreshing mod manager list due to inconsistent state.")
-                self.mod_manager.refresh_zip_list()
+                self.mod_manager.refresh_zip_list(force=True)
             logger.debug("--- Exiting load_current_mod (failed get path/name) ---")
             return
 
         logger.debug("Checking if mod is sorted...")
-        is_sorted = check_sorted_marker(current_file_path)
-        logger.debug(f"Is sorted: {is_sorted}, Skip sorted setting: {self.skip_sorted}")
+        is_sorted = self.mod_manager.is_current_sorted()
+        logger.debug("Is sorted: %s, Skip sorted setting: %s", is_sorted, self.skip_sorted)
 
         if is_sorted and self.skip_sorted:
             logger.info(f"Skipping already sorted mod: {file_name}")
@@ -660,7 +661,7 @@ class ModSorterApp(QMainWindow):
         file_label_text = f"File: {file_name}"
         if is_sorted:
             file_label_text = f"File: <span style='color: green;'>{file_name} (Sorted)</span>"
-        logger.debug(f"Setting file name label: '{file_label_text[:100]}...'")
+        logger.debug("Setting file name label: '%s...'", file_label_text[:100])
         self.file_name_label.setText(file_label_text)
         logger.debug("File name label set.")
 
@@ -670,31 +671,31 @@ class ModSorterApp(QMainWindow):
             stats_text = f"Size: {size_str} | Modified: {mod_str}"
         else:
             stats_text = "Size: N/A | Modified: N/A"
-        logger.debug(f"Setting file stats label: '{stats_text}'")
+        logger.debug("Setting file stats label: '%s'", stats_text)
         self.file_stats_label.setText(stats_text)
         logger.debug("File stats label set.")
 
         name_text = f"Name: {self.current_mod_info.name}"
         author_text = f"Author: {self.current_mod_info.author}"
         type_text = f"Type: {self.current_mod_info.type.value}"
-        logger.debug(f"Setting name label: '{name_text}'")
+        logger.debug("Setting name label: '%s'", name_text)
         self.name_label.setText(name_text)
         logger.debug("Name label set.")
-        logger.debug(f"Setting author label: '{author_text}'")
+        logger.debug("Setting author label: '%s'", author_text)
         self.author_label.setText(author_text)
         logger.debug("Author label set.")
-        logger.debug(f"Setting type label: '{type_text}'")
+        logger.debug("Setting type label: '%s'", type_text)
         self.type_label.setText(type_text)
         logger.debug("Type label set.")
 
         desc_content = self.current_mod_info.description
-        logger.debug(f"Setting description text (length: {len(desc_content)})...")
+        logger.debug("Setting description text (length: %s)...", len(desc_content))
         self.desc_text.setText(desc_content)
         logger.debug("Description text set.")
 
         logger.debug("Formatting additional info...")
         additional_content = self.format_additional_info(self.current_mod_info)
-        logger.debug(f"Setting additional info text (length: {len(additional_content)})...")
+        logger.debug("Setting additional info text (length: %s)...", len(additional_content))
         self.additional_info_text.setText(additional_content)
         logger.debug("Additional info text set.")
 
@@ -704,7 +705,7 @@ class ModSorterApp(QMainWindow):
         logger.debug("Returned from update_image_display.")
 
         counter_text = f"Mod {current_index + 1} of {zip_files_count}"
-        logger.debug(f"Setting counter label: '{counter_text}'")
+        logger.debug("Setting counter label: '%s'", counter_text)
         self.counter_label.setText(counter_text)
         logger.debug("Counter label set.")
 
@@ -760,6 +761,14 @@ class ModSorterApp(QMainWindow):
         handler = MoveModHandler(self, self.mod_manager, self.current_mod_info)
         handler.handle()
 
+    def refresh_mods_clicked(self):
+        """Picks up mods added or removed outside the app; unchanged folders aren't rescanned."""
+        if not self.mod_manager:
+            return
+        logger.info("Manual refresh requested.")
+        self.mod_manager.refresh_zip_list()
+        self.load_current_mod()
+
     def move_mod_to_folder_clicked(self, folder_path):
         handler = MoveModToFolderHandler(self, self.mod_manager, folder_path)
         handler.handle()
\ No newline at end of file
@@ -0,0 +1,66 @@
+import io
+from typing import BinaryIO, Optional
+from config.app_config import AppConfig
+from utils.logger import logger
+
+try:
+    # pip install pillow (pillow-simd is a drop-in with vectorized resampling)
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def make_thumbnail(data: bytes, max_width: int = AppConfig.IMAGE_DISPLAY_WIDTH,
+                   max_height: int = AppConfig.IMAGE_DISPLAY_HEIGHT) -> bytes:
+    """
+    Downscales encoded image bytes to fit the preview area.
+
+    Images that already fit, that Pillow can't decode, or any image when Pillow isn't
+    installed are returned unchanged. Opaque images are re-encoded as JPEG and images
+    with transparency as PNG, both of which Qt always decodes.
+    """
+    if Image is None:
+        return data
+
+    try:
+        thumbnail = _encode_thumbnail(io.BytesIO(data), max_width, max_height)
+    except Exception as e:
+        logger.warning(f"Could not create thumbnail, keeping original image: {e}")
+        return data
+    return data if thumbnail is None else thumbnail
+
+
+def make_thumbnail_from_file(fp: BinaryIO, max_width: int = AppConfig.IMAGE_DISPLAY_WIDTH,
+                             max_height: int = AppConfig.IMAGE_DISPLAY_HEIGHT) -> bytes:
+    """
+    Same as make_thumbnail, but decodes straight from a seekable stream (such as an
+    open zip entry), so oversized images are never held in memory in encoded form.
+    Images that are kept unchanged are read in full after rewinding.
+    """
+    if Image is not None:
+        try:
+            thumbnail = _encode_thumbnail(fp, max_width, max_height)
+            if thumbnail is not None:
+                return thumbnail
+        except Exception as e:
+            logger.warning(f"Could not create thumbnail, keeping original image: {e}")
+        fp.seek(0)
+    return fp.read()
+
+
+def _encode_thumbnail(fp: BinaryIO, max_width: int, max_height: int) -> Optional[bytes]:
+    """Returns the re-encoded thumbnail, or None if the image already fits."""
+    with Image.open(fp) as img:
+        if img.width <= max_width and img.height <= max_height:
+            return None
+
+        if img.format == 'JPEG':
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full resolution
+            img.draft('RGB', (max_width, max_height))
+        img.thumbnail((max_width, max_height), Image.LANCZOS)
+        out = io.BytesIO()
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img.save(out, 'PNG', optimize=False)
+        else:
+            img.convert('RGB').save(out, 'JPEG', quality=85)
+        return out.getvalue()